@@ -1,6 +1,10 @@
-from flask import Flask, render_template, request, jsonify
-import requests
+from flask import Flask, Response, render_template, request, jsonify
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from health import monitor_from_env
+from http_client import client_from_env
 
 app = Flask(__name__, template_folder="templates")
 
@@ -8,6 +12,76 @@ USERS_HOST = os.environ.get("USERS_HOST", "http://localhost:5001")
 PRODUCTS_HOST = os.environ.get("PRODUCTS_HOST", "http://localhost:5002")
 ORDERS_HOST = os.environ.get("ORDERS_HOST", "http://localhost:5003")
 
+# One keep-alive connection pool per backend, shared by all request threads
+users_api = client_from_env("users", USERS_HOST)
+products_api = client_from_env("products", PRODUCTS_HOST)
+orders_api = client_from_env("orders", ORDERS_HOST)
+BACKENDS = (users_api, products_api, orders_api)
+health_monitor = monitor_from_env(BACKENDS)
+
+# Threads for fetching several backends at once on behalf of one request
+fanout_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("FRONTEND_FANOUT_WORKERS", "32")), thread_name_prefix="fanout"
+)
+DASHBOARD_DEADLINE = float(os.environ.get("FRONTEND_DASHBOARD_DEADLINE", "5"))
+DASHBOARD_SECTIONS = ((users_api, "/users"), (products_api, "/products"), (orders_api, "/orders"))
+
+# Pagination headers passed back from the users service
+PAGINATION_HEADERS = ("X-Next-Cursor", "Link")
+# Conditional-request headers forwarded to, and validators returned from, the products service
+CONDITIONAL_REQUEST_HEADERS = ("If-None-Match", "If-Modified-Since")
+VALIDATOR_HEADERS = ("ETag", "Last-Modified", "Cache-Control", "Vary")
+# Describe the body bytes, which are passed through untouched
+ENTITY_HEADERS = ("Content-Type", "Content-Encoding", "Content-Length")
+PROXY_CHUNK_SIZE = int(os.environ.get("FRONTEND_PROXY_CHUNK_SIZE", "65536"))
+
+
+class SizedStream:
+    """Request body stream with a known length, so requests sends Content-Length instead of chunking."""
+
+    def __init__(self, stream, length):
+        self._stream = stream
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        return self._stream.read(size)
+
+
+def proxy(backend, path, request_headers=(), response_headers=()):
+    """
+    Forward the current request to backend and stream its response back.
+
+    Bodies are never decoded: the request body is read from the client as
+    the backend consumes it, and the response bytes are relayed in
+    PROXY_CHUNK_SIZE chunks with their original Content-Type,
+    Content-Encoding and Content-Length. The client's Accept-Encoding is
+    forwarded so the backend only compresses what the client can read.
+    """
+    names = ("Accept",) + tuple(request_headers)
+    headers = {name: request.headers[name] for name in names if name in request.headers}
+    headers["Accept-Encoding"] = request.headers.get("Accept-Encoding", "identity")
+    body = None
+    if request.method != "GET":
+        headers["Content-Type"] = request.headers.get("Content-Type", "application/json")
+        length = request.content_length
+        body = request.stream if length is None else SizedStream(request.stream, length)
+    response = backend.request(request.method, path, params=request.args, data=body, headers=headers, stream=True)
+
+    passthrough = {
+        name: response.headers[name]
+        for name in ENTITY_HEADERS + tuple(response_headers)
+        if name in response.headers
+    }
+    relayed = Response(
+        response.raw.stream(PROXY_CHUNK_SIZE, decode_content=False), status=response.status_code, headers=passthrough
+    )
+    # Hands the connection back to the keep-alive pool once the body has been sent
+    relayed.call_on_close(response.close)
+    return relayed
+
 
 @app.route("/")
 def index():
@@ -19,11 +93,7 @@ def index():
 def users_proxy():
     """Proxy requests to users service"""
     try:
-        if request.method == "GET":
-            response = requests.get(f"{USERS_HOST}/users", timeout=5)
-        else:
-            response = requests.post(f"{USERS_HOST}/users", json=request.json, timeout=5)
-        return jsonify(response.json()), response.status_code
+        return proxy(users_api, "/users", response_headers=PAGINATION_HEADERS)
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
 
@@ -32,13 +102,12 @@ def users_proxy():
 def products_proxy():
     """Proxy requests to products service"""
     try:
-        if request.method == "GET":
-            response = requests.get(f"{PRODUCTS_HOST}/products", timeout=5)
-        else:
-            response = requests.post(
-                f"{PRODUCTS_HOST}/products", json=request.json, timeout=5
-            )
-        return jsonify(response.json()), response.status_code
+        return proxy(
+            products_api,
+            "/products",
+            request_headers=CONDITIONAL_REQUEST_HEADERS,
+            response_headers=VALIDATOR_HEADERS,
+        )
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
 
@@ -47,44 +116,71 @@ def products_proxy():
 def orders_proxy():
     """Proxy requests to orders service"""
     try:
-        if request.method == "GET":
-            response = requests.get(f"{ORDERS_HOST}/orders", timeout=5)
-        else:
-            response = requests.post(f"{ORDERS_HOST}/orders", json=request.json, timeout=5)
-        return jsonify(response.json()), response.status_code
+        return proxy(orders_api, "/orders")
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
 
 
+def fetch_section(backend, path):
+    """GET one dashboard section; returns {"data", "error", "latency_ms"}."""
+    started = time.monotonic()
+    try:
+        response = backend.get(path, timeout=(backend.timeout[0], DASHBOARD_DEADLINE))
+        body = response.json()
+        if response.ok:
+            section = {"data": body, "error": None}
+        else:
+            section = {"data": None, "error": body.get("error") if isinstance(body, dict) else response.reason}
+    except Exception as exc:
+        section = {"data": None, "error": str(exc)}
+    section["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+    return section
+
+
+@app.route("/api/dashboard")
+def dashboard():
+    """
+    Users, products and orders for the main page in one response
+
+    The three backends are fetched concurrently, so the page waits for the
+    slowest one rather than all three in turn. A backend that fails or misses
+    FRONTEND_DASHBOARD_DEADLINE gets an error in its own section and the
+    others are still returned.
+    """
+    futures = {
+        backend.name: fanout_executor.submit(fetch_section, backend, path) for backend, path in DASHBOARD_SECTIONS
+    }
+    wait(futures.values(), timeout=DASHBOARD_DEADLINE)
+    sections = {}
+    for name, future in futures.items():
+        if future.done():
+            sections[name] = future.result()
+        else:
+            sections[name] = {"data": None, "error": "timeout", "latency_ms": None}
+    return jsonify(sections), 200
+
+
 @app.route("/health")
 def health():
-    """Health check endpoint"""
-    services_status = {}
-
-    # Check each service
-    for service_name, service_url in [
-        ("users", USERS_HOST),
-        ("products", PRODUCTS_HOST),
-        ("orders", ORDERS_HOST),
-    ]:
-        try:
-            response = requests.get(f"{service_url}/health", timeout=2)
-            services_status[service_name] = "healthy" if response.status_code == 200 else "unhealthy"
-        except Exception:
-            services_status[service_name] = "unreachable"
-
-    overall_status = "healthy" if all(s == "healthy" for s in services_status.values()) else "degraded"
-
+    """
+    Health check endpoint
+
+    Backends are checked concurrently and the result is cached briefly (see
+    health.py); latency_ms gives each backend's check time and age how old
+    the answer is.
+    """
+    result, age = health_monitor.status()
     return (
-        jsonify(
-            {
-                "status": overall_status,
-                "services": services_status,
-            }
-        ),
-        200 if overall_status == "healthy" else 503,
+        jsonify(dict(result, age=round(age, 3))),
+        200 if result["status"] == "healthy" else 503,
     )
 
 
+@app.route("/health/http-pool")
+def http_pool_stats():
+    """Per-backend request counters and keep-alive connection reuse"""
+    return jsonify({backend.name: backend.stats() for backend in BACKENDS}), 200
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=3000, debug=False)
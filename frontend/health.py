@@ -0,0 +1,101 @@
+"""
+Concurrent, cached health checks of the backend services.
+
+All backends are checked in parallel under one overall deadline, so a dead
+backend costs at most the deadline rather than adding its timeout to the
+others'. The last result is kept for ttl seconds; after that it is still
+served (for up to max_stale seconds) while a single background refresh runs,
+so load-balancer probes are answered from memory. Ages are measured with
+clock (time.monotonic unless given), which tests replace.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class HealthMonitor:
+    """Checks a set of BackendClients' /health endpoints and caches the outcome."""
+
+    def __init__(self, backends, deadline=2.0, ttl=2.0, max_stale=10.0, clock=time.monotonic):
+        self.backends = backends
+        self.deadline = deadline
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=len(backends) + 1, thread_name_prefix="health")
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._result = None
+        self._checked_at = None
+        self._refreshing = False
+
+    def _check(self, backend):
+        started = time.monotonic()
+        try:
+            response = backend.get("/health", timeout=(backend.timeout[0], self.deadline))
+            status = "healthy" if response.status_code == 200 else "unhealthy"
+        except Exception:
+            status = "unreachable"
+        return status, (time.monotonic() - started) * 1000
+
+    def check(self):
+        """Check every backend concurrently and return the fresh result."""
+        futures = {backend.name: self._executor.submit(self._check, backend) for backend in self.backends}
+        wait(futures.values(), timeout=self.deadline)
+        services = {}
+        latency = {}
+        for name, future in futures.items():
+            if future.done():
+                services[name], latency[name] = future.result()
+                latency[name] = round(latency[name], 1)
+            else:
+                services[name], latency[name] = "timeout", None
+        status = "healthy" if all(s == "healthy" for s in services.values()) else "degraded"
+        result = {"status": status, "services": services, "latency_ms": latency}
+        with self._lock:
+            self._result = result
+            self._checked_at = self._clock()
+        return result
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.check()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        self._executor.submit(run)
+
+    def status(self):
+        """Return (result, age in seconds), refreshing synchronously only when nothing usable is cached."""
+        with self._lock:
+            result, checked_at = self._result, self._checked_at
+        age = self._clock() - checked_at if checked_at is not None else None
+        if age is not None and age <= self.ttl:
+            return result, age
+        if age is not None and age <= self.max_stale:
+            self._refresh_in_background()
+            return result, age
+        # Nothing cached or too old to serve: one caller checks, concurrent callers wait for it
+        with self._refresh_lock:
+            with self._lock:
+                if self._checked_at is not None and self._clock() - self._checked_at <= self.ttl:
+                    return self._result, self._clock() - self._checked_at
+            return self.check(), 0.0
+
+
+def monitor_from_env(backends):
+    """Build a HealthMonitor configured from FRONTEND_HEALTH_* environment variables."""
+    return HealthMonitor(
+        backends,
+        deadline=float(os.environ.get("FRONTEND_HEALTH_DEADLINE", "2")),
+        ttl=float(os.environ.get("FRONTEND_HEALTH_TTL", "2")),
+        max_stale=float(os.environ.get("FRONTEND_HEALTH_MAX_STALE", "10")),
+    )
@@ -0,0 +1,94 @@
+"""
+Pooled keep-alive HTTP clients for the backend services.
+
+Each backend gets one urllib3 connection pool (through a requests
+HTTPAdapter) shared by every request thread, so TCP connections are reused
+instead of opened per proxied call. requests.Session is not safe to share
+between threads, so every thread gets its own lightweight Session with the
+shared adapter mounted on it.
+"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class BackendClient:
+    """HTTP client for one backend base URL with a bounded keep-alive pool."""
+
+    def __init__(self, name, base_url, pool_size=10, connect_timeout=1.0, read_timeout=5.0):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        # pool_block=False: a burst above pool_size opens extra connections that are not kept
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "errors": 0}
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.trust_env = False
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            self._local.session = session
+        return session
+
+    def request(self, method, path, **kwargs):
+        """Send a request to base_url + path; timeout defaults to (connect, read) for this backend."""
+        kwargs.setdefault("timeout", self.timeout)
+        with self._lock:
+            self._counters["requests"] += 1
+        try:
+            return self._session().request(method, self.base_url + path, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self._counters["errors"] += 1
+            raise
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def stats(self):
+        """Request counters plus connection reuse from the underlying urllib3 pools."""
+        with self._lock:
+            data = dict(self._counters)
+        pools = self._adapter.poolmanager.pools
+        connections = sent = idle = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            connections += pool.num_connections
+            sent += pool.num_requests
+            if pool.pool is not None:
+                # The pool's LifoQueue holds None for slots without an open connection
+                idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+        data.update(
+            {
+                "pool_size": self.pool_size,
+                "connections_opened": connections,
+                "idle_connections": idle,
+                "reused": max(sent - connections, 0),
+                "reuse_ratio": (sent - connections) / sent if sent else 0.0,
+            }
+        )
+        return data
+
+
+def client_from_env(name, base_url):
+    """Build a BackendClient sized from FRONTEND_HTTP_* environment variables."""
+    return BackendClient(
+        name,
+        base_url,
+        pool_size=int(os.environ.get("FRONTEND_HTTP_POOL_SIZE", "10")),
+        connect_timeout=float(os.environ.get("FRONTEND_HTTP_CONNECT_TIMEOUT", "1")),
+        read_timeout=float(os.environ.get("FRONTEND_HTTP_READ_TIMEOUT", "5")),
+    )
@@ -0,0 +1,72 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class FakeBackend:
+    """
+    Keep-alive HTTP server standing in for a backend service.
+
+    routes maps a path (without query string) to (status, headers, body,
+    delay in seconds); every request's method, path, headers and body are
+    recorded in requests.
+    """
+
+    def __init__(self):
+        self.routes = {"/health": (200, {"Content-Type": "application/json"}, b'{"status": "healthy"}', 0)}
+        self.requests = []
+        self.connections = 0
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                backend.connections += 1
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                path = self.path.split("?", 1)[0]
+                backend.requests.append(
+                    {"method": self.command, "path": self.path, "headers": self.headers, "body": body}
+                )
+                status, headers, payload, delay = backend.routes.get(
+                    path, (404, {"Content-Type": "application/json"}, b'{"error": "not found"}', 0)
+                )
+                if delay:
+                    time.sleep(delay)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if "Content-Length" not in headers:
+                    self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def route(self, path, body=b"[]", status=200, headers=None, delay=0):
+        self.routes[path] = (status, headers or {"Content-Type": "application/json"}, body, delay)
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def fake_backend():
+    backend = FakeBackend()
+    yield backend
+    backend.close()
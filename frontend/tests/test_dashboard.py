@@ -0,0 +1,58 @@
+import time
+
+import app as frontend_app
+from http_client import BackendClient
+
+
+class HangingBackend:
+    """Backend that does not answer before the dashboard deadline."""
+
+    name = "orders"
+    timeout = (1.0, 5.0)
+
+    def get(self, path, **kwargs):
+        time.sleep(1)
+        raise AssertionError("should have been abandoned at the deadline")
+
+
+def test_dashboard_returns_each_section_on_its_own(fake_backend, monkeypatch):
+    fake_backend.route("/users", b'[{"id": 1, "name": "Ada"}]')
+    fake_backend.route("/products", b'{"error": "database unavailable"}', status=500)
+    monkeypatch.setattr(frontend_app, "DASHBOARD_DEADLINE", 0.3)
+    monkeypatch.setattr(
+        frontend_app,
+        "DASHBOARD_SECTIONS",
+        (
+            (BackendClient("users", fake_backend.url), "/users"),
+            (BackendClient("products", fake_backend.url), "/products"),
+            (HangingBackend(), "/orders"),
+        ),
+    )
+
+    started = time.monotonic()
+    response = frontend_app.app.test_client().get("/api/dashboard")
+    assert time.monotonic() - started < 0.9
+
+    assert response.status_code == 200
+    sections = response.get_json()
+    assert sections["users"]["data"] == [{"id": 1, "name": "Ada"}]
+    assert sections["users"]["error"] is None
+    assert sections["products"] == {
+        "data": None,
+        "error": "database unavailable",
+        "latency_ms": sections["products"]["latency_ms"],
+    }
+    assert sections["orders"] == {"data": None, "error": "timeout", "latency_ms": None}
+
+
+def test_dashboard_reports_unreachable_backend(monkeypatch):
+    monkeypatch.setattr(
+        frontend_app,
+        "DASHBOARD_SECTIONS",
+        ((BackendClient("users", "http://127.0.0.1:9", connect_timeout=0.2), "/users"),),
+    )
+
+    section = frontend_app.app.test_client().get("/api/dashboard").get_json()["users"]
+    assert section["data"] is None
+    assert section["error"]
+    assert section["latency_ms"] is not None
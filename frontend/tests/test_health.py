@@ -0,0 +1,100 @@
+import time
+
+import app as frontend_app
+from health import HealthMonitor
+from http_client import BackendClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def health_checks(backend):
+    return sum(1 for request in backend.requests if request["path"] == "/health")
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_result_is_cached_for_ttl(fake_backend):
+    clock = FakeClock()
+    monitor = HealthMonitor([BackendClient("users", fake_backend.url)], ttl=2, max_stale=10, clock=clock)
+
+    result, age = monitor.status()
+    assert result == {"status": "healthy", "services": {"users": "healthy"}, "latency_ms": result["latency_ms"]}
+    assert age == 0.0
+    clock.now += 1.5
+    assert monitor.status() == (result, 1.5)
+    assert health_checks(fake_backend) == 1
+
+
+def test_stale_result_is_served_while_refreshing_in_background(fake_backend):
+    clock = FakeClock()
+    monitor = HealthMonitor([BackendClient("users", fake_backend.url)], ttl=2, max_stale=10, clock=clock)
+    first, _ = monitor.status()
+
+    fake_backend.route("/health", status=500, body=b"{}", delay=0.2)
+    clock.now += 5
+    result, age = monitor.status()
+    # Answered from the cache without waiting for the slow check
+    assert result is first and age == 5
+    wait_for(lambda: monitor.status()[0]["status"] == "degraded")
+    assert monitor.status()[0]["services"] == {"users": "unhealthy"}
+    assert health_checks(fake_backend) == 2
+
+
+def test_result_older_than_max_stale_is_checked_synchronously(fake_backend):
+    clock = FakeClock()
+    monitor = HealthMonitor([BackendClient("users", fake_backend.url)], ttl=2, max_stale=10, clock=clock)
+    monitor.status()
+
+    fake_backend.route("/health", status=503, body=b"{}")
+    clock.now += 11
+    result, age = monitor.status()
+    assert age == 0.0
+    assert result["services"] == {"users": "unhealthy"}
+
+
+class SlowBackend:
+    """Backend whose /health answers after delay seconds, whatever timeout it is given."""
+
+    def __init__(self, name, delay):
+        self.name = name
+        self.timeout = (1.0, 5.0)
+        self.delay = delay
+
+    def get(self, path, **kwargs):
+        time.sleep(self.delay)
+        raise AssertionError("should have been abandoned at the deadline")
+
+
+def test_slow_backend_is_cut_off_at_the_deadline(fake_backend):
+    unreachable = BackendClient("products", "http://127.0.0.1:9", connect_timeout=0.2)
+    monitor = HealthMonitor(
+        [BackendClient("users", fake_backend.url), SlowBackend("orders", 1), unreachable], deadline=0.3
+    )
+
+    started = time.monotonic()
+    result = monitor.check()
+    assert time.monotonic() - started < 0.9
+    assert result["status"] == "degraded"
+    assert result["services"] == {"users": "healthy", "orders": "timeout", "products": "unreachable"}
+    assert result["latency_ms"]["orders"] is None
+
+
+def test_health_endpoint_reports_degraded_as_503(monkeypatch):
+    monitor = HealthMonitor([])
+    monkeypatch.setattr(monitor, "status", lambda: ({"status": "degraded", "services": {}, "latency_ms": {}}, 1.25))
+    monkeypatch.setattr(frontend_app, "health_monitor", monitor)
+
+    response = frontend_app.app.test_client().get("/health")
+    assert response.status_code == 503
+    assert response.get_json()["age"] == 1.25
@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+import requests
+
+from http_client import BackendClient, client_from_env
+
+
+def test_requests_reuse_one_keep_alive_connection(fake_backend):
+    fake_backend.route("/users", b'[{"id": 1}]')
+    client = BackendClient("users", fake_backend.url + "/")
+
+    for _ in range(5):
+        assert client.get("/users").json() == [{"id": 1}]
+
+    stats = client.stats()
+    assert stats["requests"] == 5
+    assert stats["connections_opened"] == 1
+    assert stats["reused"] == 4
+    assert stats["idle_connections"] == 1
+    assert fake_backend.connections == 1
+
+
+def test_threads_share_the_pool_up_to_pool_size(fake_backend):
+    fake_backend.route("/products", delay=0.05)
+    client = BackendClient("products", fake_backend.url, pool_size=2)
+
+    def worker():
+        for _ in range(3):
+            client.get("/products")
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = client.stats()
+    assert stats["requests"] == 12
+    # Extra connections opened during the burst are not kept
+    assert stats["idle_connections"] <= 2
+
+
+def test_connection_errors_are_counted():
+    client = BackendClient("orders", "http://127.0.0.1:9", connect_timeout=0.5)
+    with pytest.raises(requests.RequestException):
+        client.get("/orders")
+    assert client.stats()["errors"] == 1
+
+
+def test_client_from_env(monkeypatch):
+    monkeypatch.setenv("FRONTEND_HTTP_POOL_SIZE", "4")
+    monkeypatch.setenv("FRONTEND_HTTP_READ_TIMEOUT", "2.5")
+    client = client_from_env("users", "http://users:5001")
+    assert client.pool_size == 4
+    assert client.timeout == (1.0, 2.5)
@@ -0,0 +1,75 @@
+import gzip
+import json
+
+import pytest
+
+import app as frontend_app
+from http_client import BackendClient
+
+
+@pytest.fixture
+def client(fake_backend, monkeypatch):
+    for name in ("users_api", "products_api", "orders_api"):
+        monkeypatch.setattr(frontend_app, name, BackendClient(name.split("_")[0], fake_backend.url))
+    return frontend_app.app.test_client()
+
+
+def test_gzip_body_is_relayed_without_decoding(client, fake_backend):
+    compressed = gzip.compress(json.dumps([{"id": i} for i in range(50)]).encode())
+    fake_backend.route(
+        "/products",
+        compressed,
+        headers={
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+            "ETag": '"v7"',
+            "X-Backend-Only": "1",
+        },
+    )
+
+    response = client.get("/products", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.get_data() == compressed
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Content-Length"] == str(len(compressed))
+    assert response.headers["ETag"] == '"v7"'
+    assert "X-Backend-Only" not in response.headers
+    assert fake_backend.requests[-1]["headers"]["Accept-Encoding"] == "gzip"
+
+
+def test_status_and_conditional_headers_pass_through(client, fake_backend):
+    fake_backend.route("/products", b"", status=304, headers={"ETag": '"v7"'})
+
+    response = client.get("/products?limit=5", headers={"If-None-Match": '"v7"'})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == '"v7"'
+    forwarded = fake_backend.requests[-1]
+    assert forwarded["path"] == "/products?limit=5"
+    assert forwarded["headers"]["If-None-Match"] == '"v7"'
+    # A client that did not ask for compression gets the body as-is
+    client.get("/products")
+    assert fake_backend.requests[-1]["headers"]["Accept-Encoding"] == "identity"
+
+
+def test_request_body_and_pagination_headers_pass_through(client, fake_backend):
+    fake_backend.route("/users", b'{"id": 3}', status=201, headers={"Content-Type": "application/json"})
+    payload = json.dumps({"name": "Ada", "email": "ada@example.com"}).encode()
+
+    response = client.post("/users", data=payload, content_type="application/json")
+    assert response.status_code == 201
+    assert response.get_data() == b'{"id": 3}'
+    forwarded = fake_backend.requests[-1]
+    assert forwarded["body"] == payload
+    assert forwarded["headers"]["Content-Length"] == str(len(payload))
+    assert "Transfer-Encoding" not in forwarded["headers"]
+
+    fake_backend.route("/users", b"[]", headers={"Content-Type": "application/json", "X-Next-Cursor": "abc"})
+    assert client.get("/users").headers["X-Next-Cursor"] == "abc"
+
+
+def test_backend_error_status_is_relayed(client, fake_backend):
+    fake_backend.route("/orders", b'{"error": "boom"}', status=500)
+
+    response = client.get("/orders")
+    assert response.status_code == 500
+    assert response.get_json() == {"error": "boom"}
@@ -1,13 +1,37 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
+import base64
+import binascii
+import csv
+import io
+import json
 import os
+import socket
+from datetime import datetime
+from decimal import Decimal
+from urllib.parse import urlencode
+import click
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, errorcode
+
+from db_pool import checkout, init_app, pool_from_env, start_pool
+from group_commit import IntakeFull, IntakeTimeout, OrderBatcher, OutcomeUnknown
+from migrations import run_migrations
+from price_replica import PriceReplica
+from streaming import NDJSON, gzip_chunks, stream_cursor, wants_gzip, wants_stream
 
 app = Flask(__name__)
 
+VALID_STATUSES = ["created", "pending", "processing", "shipped", "delivered", "cancelled"]
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Opt-in group commit for POST /orders (see group_commit.py)
+GROUP_COMMIT = os.environ.get("ORDERS_GROUP_COMMIT", "0") == "1"
+GROUP_COMMIT_TIMEOUT = float(os.environ.get("ORDERS_GROUP_COMMIT_TIMEOUT", "10"))
+PRICE_REPLICA = os.environ.get("ORDERS_PRICE_REPLICA", "1") == "1"
 
-def get_db():
-    """Create database connection"""
+
+def _connect():
+    """Open a new database connection."""
     return mysql.connector.connect(
         host=os.environ.get("DB_HOST", "mysql"),
         user=os.environ.get("DB_USER", "root"),
@@ -16,40 +40,560 @@ def get_db():
     )
 
 
+db_pool = pool_from_env(_connect)
+init_app(app)
+
+
+def get_db():
+    """Check out a pooled connection bound to the current app context."""
+    return checkout(db_pool)
+
+
 @app.route("/health", methods=["GET"])
 def health():
     """Health check endpoint"""
     return jsonify({"status": "healthy"}), 200
 
 
+@app.route("/health/db-pool", methods=["GET"])
+def db_pool_stats():
+    """Connection pool gauges and counters"""
+    return jsonify(db_pool.stats()), 200
+
+
+price_replica = PriceReplica(
+    refresh_interval=float(os.environ.get("ORDERS_PRICE_REPLICA_REFRESH", "1")),
+    max_staleness=float(os.environ.get("ORDERS_PRICE_REPLICA_MAX_STALENESS", "5")),
+    # One consumer per process: each worker keeps its own replica
+    consumer=os.environ.get("ORDERS_PRICE_REPLICA_ID", f"orders@{socket.gethostname()}:{os.getpid()}"),
+)
+
+
+@app.route("/health/price-replica", methods=["GET"])
+def price_replica_stats():
+    """Size, version, age and hit rate of the in-memory product price replica"""
+    return jsonify(dict(price_replica.stats(), enabled=PRICE_REPLICA)), 200
+
+
+LIST_ORDERS_QUERY = """
+    SELECT o.id, o.user_id, o.product_id, o.quantity,
+           o.status, o.total_price, o.created_at,
+           u.name as user_name, p.name as product_name
+    FROM {table} o
+    JOIN users u ON o.user_id = u.id
+    JOIN products p ON o.product_id = p.id
+    {where}
+    ORDER BY o.created_at DESC, o.id DESC
+"""
+
+
+def encode_cursor(created_at, order_id):
+    """Opaque page cursor for the position just after (created_at, order_id)."""
+    value = created_at.isoformat() if isinstance(created_at, datetime) else str(created_at)
+    return base64.urlsafe_b64encode(f"{value}|{order_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Return the (created_at, id) encoded by encode_cursor, or raise ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        created_at, order_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def parse_page_size(value):
+    """Parse ?limit=, defaulting to DEFAULT_PAGE_SIZE; raise ValueError if out of range."""
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    limit = int(value)
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def parse_datetime_arg(args, name):
+    if not args.get(name):
+        return None
+    try:
+        return datetime.fromisoformat(args[name])
+    except ValueError as exc:
+        raise ValueError(f"{name} must be an ISO 8601 date or datetime") from exc
+
+
+def order_filters(args):
+    """
+    Build WHERE conditions for ?status=, ?from=, ?to= and the ?before= cursor.
+
+    Every condition is a range on (status, created_at, id) so it can be served
+    by the idx_orders_created_at_id and idx_orders_status_created_at_id indexes.
+    Returns (conditions, params); raises ValueError on bad input.
+    """
+    conditions = []
+    params = []
+    status = args.get("status")
+    if status:
+        if status not in VALID_STATUSES:
+            raise ValueError(f"Invalid status. Valid values: {', '.join(VALID_STATUSES)}")
+        conditions.append("o.status = %s")
+        params.append(status)
+    start = parse_datetime_arg(args, "from")
+    if start is not None:
+        conditions.append("o.created_at >= %s")
+        params.append(start)
+    end = parse_datetime_arg(args, "to")
+    if end is not None:
+        conditions.append("o.created_at < %s")
+        params.append(end)
+    if args.get("before"):
+        created_at, order_id = decode_cursor(args["before"])
+        conditions.append("(o.created_at < %s OR (o.created_at = %s AND o.id < %s))")
+        params.extend([created_at, created_at, order_id])
+    return conditions, params
+
+
+def where_clause(conditions):
+    return "WHERE " + " AND ".join(conditions) if conditions else ""
+
+
+def wants_archived():
+    return request.args.get("include_archived") == "1"
+
+
+def listing_query(template, conditions, params, include_archived, limit=None):
+    """
+    Return (query, params) for a listing template over orders, or over orders
+    and orders_history merged newest first. Each side of the UNION is limited
+    on its own so both can stop early on their (created_at, id) indexes.
+    """
+    where = where_clause(conditions)
+    tail = " LIMIT %s" if limit is not None else ""
+    limit_params = [limit] if limit is not None else []
+    query = template.format(table="orders", where=where) + tail
+    if not include_archived:
+        return query, params + limit_params
+    history = template.format(table="orders_history", where=where) + tail
+    return (
+        f"({query}) UNION ALL ({history}) ORDER BY created_at DESC, id DESC" + tail,
+        (params + limit_params) * 2 + limit_params,
+    )
+
+
+def page_response(rows, limit):
+    """jsonify the first limit rows, adding next-page headers if there are more."""
+    response = jsonify(rows[:limit])
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        cursor = encode_cursor(last["created_at"], last["id"])
+        args = request.args.to_dict()
+        args.update({"limit": limit, "before": cursor})
+        response.headers["X-Next-Cursor"] = cursor
+        response.headers["Link"] = f'<{request.path}?{urlencode(args)}>; rel="next"'
+    return response
+
+
 @app.route("/orders", methods=["GET"])
 def list_orders():
-    """List all orders"""
+    """
+    List orders newest first, one keyset page at a time.
+
+    ?limit= sets the page size (default 100) and ?before= takes the cursor
+    from the previous page's X-Next-Cursor header. ?status=, ?from= and ?to=
+    filter the listing and ?include_archived=1 adds archived orders. With
+    Accept: application/x-ndjson or ?stream=1 the matching rows are streamed,
+    capped only when ?limit= is given.
+    """
+    try:
+        limit = parse_page_size(request.args.get("limit"))
+        conditions, params = order_filters(request.args)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
     try:
         db = get_db()
         cur = db.cursor(dictionary=True)
-        cur.execute(
-            """
-            SELECT o.id, o.user_id, o.product_id, o.quantity,
-                   o.status, o.total_price, o.created_at,
-                   u.name as user_name, p.name as product_name
-            FROM orders o
-            JOIN users u ON o.user_id = u.id
-            JOIN products p ON o.product_id = p.id
-            ORDER BY o.created_at DESC
-            """
-        )
+        if wants_stream():
+            cur.execute(
+                *listing_query(
+                    LIST_ORDERS_QUERY, conditions, params, wants_archived(),
+                    limit if "limit" in request.args else None,
+                )
+            )
+            return stream_cursor(db, cur)
+        # One extra row tells us whether another page exists
+        cur.execute(*listing_query(LIST_ORDERS_QUERY, conditions, params, wants_archived(), limit + 1))
         rows = cur.fetchall()
         cur.close()
         db.close()
-        return jsonify(rows), 200
+        return page_response(rows, limit), 200
     except Error as exc:
         return jsonify({"error": str(exc)}), 500
 
 
+EXPORT_FIELDS = ("id", "user_id", "product_id", "quantity", "status", "total_price", "created_at")
+EXPORT_CHUNK_SIZE = int(os.environ.get("ORDERS_EXPORT_CHUNK_SIZE", "5000"))
+
+
+def parse_export_fields(value):
+    """Parse ?fields= into a tuple of EXPORT_FIELDS; id is always included so exports can resume."""
+    if not value:
+        return EXPORT_FIELDS
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in EXPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Valid fields: {', '.join(EXPORT_FIELDS)}")
+    if "id" not in fields:
+        fields.insert(0, "id")
+    return tuple(dict.fromkeys(fields))
+
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def iter_export_chunks(db, fields, conditions, params, after_id, include_archived=False):
+    """
+    Yield lists of order rows with id > after_id, one primary-key range at a time.
+
+    Each chunk is its own short query, and the transaction is ended after it,
+    so an export never holds a long-running read view or cursor open on the
+    orders table. The export is therefore not a point-in-time snapshot.
+
+    With include_archived, each chunk merges the next ids of orders and
+    orders_history (archived orders keep their id), so an order archived
+    while the export runs is still exported once.
+    """
+    query = (
+        f"SELECT {', '.join(fields)} FROM {{table}} WHERE "
+        + " AND ".join(conditions + ["id > %s"])
+        + " ORDER BY id LIMIT %s"
+    )
+    if include_archived:
+        query = (
+            f"({query.format(table='orders')}) UNION ALL ({query.format(table='orders_history')}) "
+            "ORDER BY id LIMIT %s"
+        )
+    else:
+        query = query.format(table="orders")
+    cur = db.cursor()
+    try:
+        while True:
+            chunk_params = params + [after_id, EXPORT_CHUNK_SIZE]
+            if include_archived:
+                chunk_params = chunk_params * 2 + [EXPORT_CHUNK_SIZE]
+            cur.execute(query, chunk_params)
+            rows = cur.fetchall()
+            db.rollback()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < EXPORT_CHUNK_SIZE:
+                return
+            after_id = rows[-1][0]
+    finally:
+        cur.close()
+        db.close()
+
+
+def encode_export(chunks, fields, fmt):
+    """Yield NDJSON lines or CSV text (with a header row) for chunks of row tuples."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        yield buffer.getvalue()
+        for rows in chunks:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([[export_value(value) for value in row] for row in rows])
+            yield buffer.getvalue()
+        return
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(fields, (export_value(value) for value in row)))) + "\n" for row in rows
+        )
+
+
+@app.route("/orders/export", methods=["GET"])
+def export_orders():
+    """
+    Stream orders for analytics as NDJSON (default) or CSV, in id order.
+
+    ?from= and ?to= limit created_at, ?fields= picks columns (id is always
+    included) and ?after_id= resumes an interrupted export after the last id
+    received. Archived orders are left out unless ?include_archived=1. The
+    tables are read in ORDERS_EXPORT_CHUNK_SIZE primary-key ranges without
+    joins, and the body is gzip-compressed when the client sends
+    Accept-Encoding: gzip or ?gzip=1.
+    """
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in ("ndjson", "csv"):
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+    try:
+        fields = parse_export_fields(request.args.get("fields"))
+        after_id = request.args.get("after_id", "0")
+        if not after_id.isdigit():
+            raise ValueError("after_id must be a non-negative integer")
+        after_id = int(after_id)
+        conditions = []
+        params = []
+        for name, op in (("from", ">="), ("to", "<")):
+            value = parse_datetime_arg(request.args, name)
+            if value is not None:
+                conditions.append(f"created_at {op} %s")
+                params.append(value)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    try:
+        db = get_db()
+    except Error as exc:
+        return jsonify({"error": str(exc)}), 500
+
+    chunks = iter_export_chunks(db, fields, conditions, params, after_id, wants_archived())
+    body = encode_export(chunks, fields, fmt)
+    headers = {"Content-Disposition": f"attachment; filename=orders.{fmt}", "Vary": "Accept-Encoding"}
+    if wants_gzip():
+        body = gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+    return Response(
+        stream_with_context(body),
+        mimetype="text/csv" if fmt == "csv" else NDJSON,
+        headers=headers,
+    )
+
+
+def call_procedure(cur, statement, params):
+    """Run a CALL in a single round trip and return the first row it selects, or None."""
+    row = None
+    for result in cur.execute(statement, params, multi=True):
+        if result.with_rows:
+            rows = result.fetchall()
+            if row is None and rows:
+                row = rows[0]
+    return row
+
+
+def missing_reference(exc):
+    """
+    Return user_not_found or product_not_found for an IntegrityError raised by
+    an orders foreign key, or None if exc is some other integrity failure.
+    """
+    if exc.errno != errorcode.ER_NO_REFERENCED_ROW_2:
+        return None
+    message = exc.msg or ""
+    if "REFERENCES `users`" in message:
+        return "user_not_found"
+    if "REFERENCES `products`" in message:
+        return "product_not_found"
+    return None
+
+
+def insert_order(user_id, product_id, quantity):
+    """
+    Create one order with a single procedure call; returns its result row.
+
+    When the price replica knows the product, create_priced_order takes the
+    price from it and skips reading products. Otherwise (unknown product or
+    stale replica) create_order looks the price up in MySQL. user_id and
+    product_id must already be validated as integers.
+    """
+    priced = price_replica.lookup(product_id) if PRICE_REPLICA else None
+    db = get_db()
+    cur = db.cursor(dictionary=True)
+    if priced is None:
+        # User check, pricing and insert happen server-side in one round trip
+        result = call_procedure(cur, "CALL create_order(%s, %s, %s)", (user_id, product_id, quantity))
+    else:
+        try:
+            result = call_procedure(
+                cur, "CALL create_priced_order(%s, %s, %s, %s)", (user_id, product_id, quantity, priced[1])
+            )
+        except mysql.connector.IntegrityError as exc:
+            error = missing_reference(exc)
+            if error is None:
+                raise
+            if error == "product_not_found":
+                # Deleted since the replica last saw it
+                price_replica.forget(product_id)
+            result = {"error": error, "id": None, "total_price": None}
+    if result is not None and not result["error"]:
+        db.commit()
+    cur.close()
+    db.close()
+    return result
+
+
+def insert_accepted_orders(cur, accepted, now, step):
+    """
+    INSERT [(user_id, product_id, quantity, result)] and fill in each result's id.
+
+    Tries one multi-row INSERT first. If a foreign key fails (a user or
+    product deleted since it was read) that statement is undone and the rows
+    are inserted one at a time, so only the orders that hit the missing row
+    fail. Returns the accepted entries that were inserted.
+    """
+    params = []
+    for user_id, product_id, quantity, result in accepted:
+        params.extend([user_id, product_id, quantity, result["total_price"], now])
+    try:
+        cur.execute(
+            "INSERT INTO orders (user_id, product_id, quantity, status, total_price, created_at) VALUES "
+            + ", ".join(["(%s, %s, %s, 'created', %s, %s)"] * len(accepted)),
+            params,
+        )
+    except mysql.connector.IntegrityError as exc:
+        if missing_reference(exc) is None:
+            raise
+    else:
+        first_id = cur.lastrowid
+        for offset, (_, _, _, result) in enumerate(accepted):
+            result["id"] = first_id + offset * step
+        return accepted
+
+    # A failed statement is rolled back on its own; the transaction stays open
+    inserted = []
+    for entry in accepted:
+        user_id, product_id, quantity, result = entry
+        try:
+            cur.execute(
+                "INSERT INTO orders (user_id, product_id, quantity, status, total_price, created_at) "
+                "VALUES (%s, %s, %s, 'created', %s, %s)",
+                (user_id, product_id, quantity, result["total_price"], now),
+            )
+        except mysql.connector.IntegrityError as exc:
+            error = missing_reference(exc)
+            if error is None:
+                raise
+            result.update({"error": error, "id": None, "total_price": None})
+            continue
+        result["id"] = cur.lastrowid
+        inserted.append(entry)
+    return inserted
+
+
+def insert_order_batch(db, orders):
+    """
+    Create a batch of orders with one multi-row INSERT and one COMMIT.
+
+    Returns one row per order shaped like the create_order procedure's result,
+    so callers handle user_not_found / product_not_found the same way. The
+    ids come from LAST_INSERT_ID(): a multi-row INSERT ... VALUES is a
+    "simple insert", for which InnoDB reserves one consecutive block of
+    auto-increment values, spaced by @@auto_increment_increment.
+    """
+    cur = db.cursor(dictionary=True)
+    try:
+        user_ids = sorted({o["user_id"] for o in orders})
+        product_ids = sorted({o["product_id"] for o in orders})
+        users = set()
+        prices = {}
+        now = step = None
+        if user_ids:
+            cur.execute("SELECT id FROM users WHERE id IN (%s)" % ", ".join(["%s"] * len(user_ids)), user_ids)
+            users = {row["id"] for row in cur.fetchall()}
+        if users and product_ids:
+            cur.execute(
+                "SELECT id, price, NOW() AS now, @@auto_increment_increment AS step FROM products WHERE id IN (%s)"
+                % ", ".join(["%s"] * len(product_ids)),
+                product_ids,
+            )
+            for row in cur.fetchall():
+                prices[row["id"]] = row["price"]
+                now, step = row["now"], row["step"]
+
+        results = []
+        accepted = []
+        for order in orders:
+            user_id = order["user_id"]
+            product_id = order["product_id"]
+            if user_id not in users:
+                results.append({"error": "user_not_found", "id": None, "total_price": None})
+            elif product_id not in prices:
+                results.append({"error": "product_not_found", "id": None, "total_price": None})
+            else:
+                result = {"error": None, "id": None, "total_price": prices[product_id] * order["quantity"]}
+                results.append(result)
+                accepted.append((user_id, product_id, order["quantity"], result))
+        if not accepted:
+            return results
+
+        accepted = insert_accepted_orders(cur, accepted, now, step)
+        if not accepted:
+            db.rollback()
+            return results
+
+        # Fold the whole batch into the aggregates: one daily row, one row per product
+        per_product = {}
+        for _, product_id, quantity, result in accepted:
+            count, units, revenue = per_product.get(product_id, (0, 0, 0))
+            per_product[product_id] = (count + 1, units + quantity, revenue + result["total_price"])
+        cur.execute(
+            "INSERT INTO order_stats_daily (day, order_count, quantity, revenue) VALUES (%s, %s, %s, %s) AS d "
+            "ON DUPLICATE KEY UPDATE order_count = order_count + d.order_count, "
+            "quantity = quantity + d.quantity, revenue = revenue + d.revenue",
+            (
+                now.date(),
+                len(accepted),
+                sum(units for _, units, _ in per_product.values()),
+                sum(revenue for _, _, revenue in per_product.values()),
+            ),
+        )
+        cur.execute(
+            "INSERT INTO order_stats_product (product_id, order_count, quantity, revenue) VALUES "
+            + ", ".join(["(%s, %s, %s, %s)"] * len(per_product))
+            + " AS d ON DUPLICATE KEY UPDATE order_count = order_count + d.order_count, "
+            "quantity = quantity + d.quantity, revenue = revenue + d.revenue",
+            [value for product_id in sorted(per_product) for value in (product_id,) + per_product[product_id]],
+        )
+        db.commit()
+        return results
+    except Error:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def flush_order_batch(orders):
+    """OrderBatcher flush callback; runs on the batcher thread with its own pooled connection."""
+    db = db_pool.acquire()
+    try:
+        return insert_order_batch(db, orders)
+    finally:
+        db.close()
+
+
+order_batcher = OrderBatcher(
+    flush_order_batch,
+    max_batch=int(os.environ.get("ORDERS_GROUP_COMMIT_MAX_BATCH", "100")),
+    max_delay=float(os.environ.get("ORDERS_GROUP_COMMIT_MAX_DELAY_MS", "5")) / 1000,
+    max_queue=int(os.environ.get("ORDERS_GROUP_COMMIT_QUEUE", "10000")),
+)
+
+
+@app.route("/health/order-batcher", methods=["GET"])
+def order_batcher_stats():
+    """Group-commit flush size, latency and queue metrics"""
+    return jsonify(dict(order_batcher.stats(), enabled=GROUP_COMMIT)), 200
+
+
 @app.route("/orders", methods=["POST"])
 def create_order():
-    """Create a new order"""
+    """
+    Create a new order
+
+    With ORDERS_GROUP_COMMIT=1 the order is handed to the in-process batcher,
+    which writes concurrent orders together; otherwise it is created on its
+    own with the create_order procedure. A batched order that times out is
+    a 503 if it was withdrawn before being written, or a 504 with
+    "outcome": "unknown" if its batch was mid-write and it may exist.
+    """
     payload = request.json
     if not payload or "user_id" not in payload or "product_id" not in payload:
         return jsonify({"error": "Invalid payload. Required: user_id, product_id"}), 400
@@ -57,6 +601,10 @@ def create_order():
     user_id = payload["user_id"]
     product_id = payload["product_id"]
     quantity = payload.get("quantity", 1)
+    # Checked up front: MySQL would round 1.9 to 1 or reject "abc" with a 500
+    for name, value in (("user_id", user_id), ("product_id", product_id)):
+        if isinstance(value, bool) or not isinstance(value, int):
+            return jsonify({"error": f"{name} must be an integer"}), 400
 
     try:
         quantity = int(quantity)
@@ -66,78 +614,67 @@ def create_order():
         return jsonify({"error": "Invalid quantity"}), 400
 
     try:
-        db = get_db()
-        cur = db.cursor(dictionary=True)
+        if GROUP_COMMIT:
+            result = order_batcher.submit(
+                {"user_id": user_id, "product_id": product_id, "quantity": quantity},
+                timeout=GROUP_COMMIT_TIMEOUT,
+            )
+        else:
+            result = insert_order(user_id, product_id, quantity)
+    except (IntakeFull, IntakeTimeout) as exc:
+        # Definitely not written: safe to retry
+        return jsonify({"error": str(exc)}), 503
+    except OutcomeUnknown as exc:
+        # The batch was being written when the wait ran out; the order may exist
+        return jsonify({"error": str(exc), "outcome": "unknown"}), 504
+    except Error as exc:
+        return jsonify({"error": str(exc)}), 500
 
-        # Verify user exists
-        cur.execute("SELECT id FROM users WHERE id = %s", (user_id,))
-        if not cur.fetchone():
-            cur.close()
-            db.close()
+    if result is None or result["error"]:
+        if result and result["error"] == "user_not_found":
             return jsonify({"error": "User not found"}), 404
+        return jsonify({"error": "Product not found"}), 404
 
-        # Verify product exists and get price
-        cur.execute("SELECT id, price FROM products WHERE id = %s", (product_id,))
-        product = cur.fetchone()
-        if not product:
-            cur.close()
-            db.close()
-            return jsonify({"error": "Product not found"}), 404
+    return (
+        jsonify(
+            {
+                "id": result["id"],
+                "user_id": user_id,
+                "product_id": product_id,
+                "quantity": quantity,
+                "status": "created",
+                "total_price": float(result["total_price"]),
+                "message": "Order created",
+            }
+        ),
+        201,
+    )
 
-        # Calculate total price
-        total_price = float(product["price"]) * quantity
 
-        # Create order
-        cur.execute(
-            """
-            INSERT INTO orders (user_id, product_id, quantity, status, total_price)
-            VALUES (%s, %s, %s, %s, %s)
-            """,
-            (user_id, product_id, quantity, "created", total_price),
-        )
-        db.commit()
-        order_id = cur.lastrowid
-
-        cur.close()
-        db.close()
-
-        return (
-            jsonify(
-                {
-                    "id": order_id,
-                    "user_id": user_id,
-                    "product_id": product_id,
-                    "quantity": quantity,
-                    "status": "created",
-                    "total_price": total_price,
-                    "message": "Order created",
-                }
-            ),
-            201,
-        )
-    except Error as exc:
-        return jsonify({"error": str(exc)}), 500
+GET_ORDER_QUERY = """
+    SELECT o.id, o.user_id, o.product_id, o.quantity,
+           o.status, o.total_price, o.created_at,
+           u.name as user_name, p.name as product_name
+    FROM {table} o
+    JOIN users u ON o.user_id = u.id
+    JOIN products p ON o.product_id = p.id
+    WHERE o.id = %s
+"""
 
 
 @app.route("/orders/<int:order_id>", methods=["GET"])
 def get_order(order_id):
-    """Get a specific order"""
+    """Get a specific order, falling back to the archive if it is not in orders"""
     try:
         db = get_db()
         cur = db.cursor(dictionary=True)
-        cur.execute(
-            """
-            SELECT o.id, o.user_id, o.product_id, o.quantity,
-                   o.status, o.total_price, o.created_at,
-                   u.name as user_name, p.name as product_name
-            FROM orders o
-            JOIN users u ON o.user_id = u.id
-            JOIN products p ON o.product_id = p.id
-            WHERE o.id = %s
-            """,
-            (order_id,),
-        )
+        cur.execute(GET_ORDER_QUERY.format(table="orders"), (order_id,))
         row = cur.fetchone()
+        if not row:
+            cur.execute(GET_ORDER_QUERY.format(table="orders_history"), (order_id,))
+            row = cur.fetchone()
+            if row:
+                row["archived"] = True
         cur.close()
         db.close()
 
@@ -148,32 +685,233 @@ def get_order(order_id):
         return jsonify({"error": str(exc)}), 500
 
 
+USER_ORDERS_QUERY = """
+    SELECT o.id, o.user_id, o.product_id, o.quantity,
+           o.status, o.total_price, o.created_at,
+           p.name as product_name, p.price as product_price
+    FROM {table} o
+    JOIN products p ON o.product_id = p.id
+    {where}
+    ORDER BY o.created_at DESC, o.id DESC
+"""
+
+
 @app.route("/orders/user/<int:user_id>", methods=["GET"])
 def get_orders_for_user(user_id):
-    """Get all orders for a specific user"""
+    """
+    Get a specific user's orders, newest first, one keyset page at a time.
+
+    Takes the same ?limit=, ?before=, ?status=, ?from= and ?to= parameters as
+    GET /orders and is served by idx_orders_user_created_at_id. ?summary=1
+    returns just the order count and total spend, aggregated by MySQL.
+    ?include_archived=1 covers archived orders too.
+    """
+    try:
+        limit = parse_page_size(request.args.get("limit"))
+        conditions, params = order_filters(request.args)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    conditions.insert(0, "o.user_id = %s")
+    params.insert(0, user_id)
+
     try:
         db = get_db()
         cur = db.cursor(dictionary=True)
-        cur.execute(
-            """
-            SELECT o.id, o.user_id, o.product_id, o.quantity,
-                   o.status, o.total_price, o.created_at,
-                   p.name as product_name, p.price as product_price
-            FROM orders o
-            JOIN products p ON o.product_id = p.id
-            WHERE o.user_id = %s
-            ORDER BY o.created_at DESC
-            """,
-            (user_id,),
-        )
+        if request.args.get("summary") == "1":
+            tables = ("orders", "orders_history") if wants_archived() else ("orders",)
+            query = " UNION ALL ".join(
+                f"SELECT o.total_price FROM {table} o " + where_clause(conditions) for table in tables
+            )
+            cur.execute(
+                "SELECT COUNT(*) AS order_count, COALESCE(SUM(o.total_price), 0) AS total_spent "
+                f"FROM ({query}) o",
+                params * len(tables),
+            )
+            summary = cur.fetchone()
+            cur.close()
+            db.close()
+            return jsonify(
+                {
+                    "user_id": user_id,
+                    "order_count": summary["order_count"],
+                    "total_spent": float(summary["total_spent"]),
+                }
+            ), 200
+
+        # One extra row tells us whether another page exists
+        cur.execute(*listing_query(USER_ORDERS_QUERY, conditions, params, wants_archived(), limit + 1))
         rows = cur.fetchall()
         cur.close()
         db.close()
-        return jsonify(rows), 200
+        return page_response(rows, limit), 200
     except Error as exc:
         return jsonify({"error": str(exc)}), 500
 
 
+BULK_STATUS_CHUNK_SIZE = int(os.environ.get("ORDERS_BULK_STATUS_CHUNK_SIZE", "1000"))
+MAX_BULK_STATUS_IDS = 100000
+LOCK_ORDERS_QUERY = (
+    "SELECT id, status, product_id, quantity, total_price, created_at FROM orders WHERE {where} FOR UPDATE"
+)
+
+
+def bulk_status_filter(spec):
+    """
+    Turn the "filter" object of PUT /orders/status into (conditions, params).
+
+    Accepts status, created_before and created_after; at least one is needed
+    so a typo cannot transition the whole table. Raises ValueError.
+    """
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError("filter must be an object with status, created_before and/or created_after")
+    unknown = set(spec) - {"status", "created_before", "created_after"}
+    if unknown:
+        raise ValueError(f"Unknown filter fields: {', '.join(sorted(unknown))}")
+    conditions = []
+    params = []
+    if "status" in spec:
+        if spec["status"] not in VALID_STATUSES:
+            raise ValueError(f"Invalid status. Valid values: {', '.join(VALID_STATUSES)}")
+        conditions.append("status = %s")
+        params.append(spec["status"])
+    for name, op in (("created_after", ">="), ("created_before", "<")):
+        if name in spec:
+            try:
+                params.append(datetime.fromisoformat(str(spec[name])))
+            except ValueError as exc:
+                raise ValueError(f"{name} must be an ISO 8601 date or datetime") from exc
+            conditions.append(f"created_at {op} %s")
+    return conditions, params
+
+
+def after_position(position):
+    """
+    Keyset condition for walking orders in (created_at, id) order: returns
+    (sql, params) for rows after the (created_at, id) position, or an empty
+    condition when position is None.
+    """
+    if position is None:
+        return "", []
+    created_at, order_id = position
+    return " AND (created_at > %s OR (created_at = %s AND id > %s))", [created_at, created_at, order_id]
+
+
+def transition_chunk(db, cur, where, params, status):
+    """
+    Lock the orders matching where, move those not already at status and
+    commit. Returns (matched rows, updated count); keeping each transaction
+    to one chunk keeps row locks short.
+    """
+    cur.execute(LOCK_ORDERS_QUERY.format(where=where), params)
+    rows = cur.fetchall()
+    changing = [row for row in rows if row["status"] != status]
+    if changing:
+        ids = [row["id"] for row in changing]
+        cur.execute(
+            "UPDATE orders SET status = %s WHERE id IN (" + ", ".join(["%s"] * len(ids)) + ")",
+            [status] + ids,
+        )
+        changes = [(row, counts_in_stats(status) - counts_in_stats(row["status"])) for row in changing]
+        apply_stats_deltas(cur, [change for change in changes if change[1]])
+    db.commit()
+    return rows, len(changing)
+
+
+@app.route("/orders/status", methods=["PUT"])
+def bulk_update_order_status():
+    """
+    Move many orders to a new status in chunked transactions.
+
+    Body: {"status": ..., "ids": [...]} or {"status": ..., "filter": {...}},
+    plus an optional "expected_status" that an order must currently have to
+    be changed. Orders that are missing, fail the guard or already have the
+    status are counted as skipped. Each chunk of up to
+    ORDERS_BULK_STATUS_CHUNK_SIZE orders is locked, updated and committed on
+    its own, so a failure part way leaves earlier chunks applied.
+    """
+    payload = request.json
+    if not isinstance(payload, dict) or "status" not in payload:
+        return jsonify({"error": "Status is required"}), 400
+    status = payload["status"]
+    expected = payload.get("expected_status")
+    for value in [status] + ([expected] if expected is not None else []):
+        if value not in VALID_STATUSES:
+            return jsonify({"error": f"Invalid status. Valid values: {', '.join(VALID_STATUSES)}"}), 400
+    if ("ids" in payload) == ("filter" in payload):
+        return jsonify({"error": "Provide exactly one of ids or filter"}), 400
+
+    ids = None
+    if "ids" in payload:
+        ids = payload["ids"]
+        if (
+            not isinstance(ids, list)
+            or not ids
+            or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids)
+        ):
+            return jsonify({"error": "ids must be a non-empty list of integers"}), 400
+        if len(ids) > MAX_BULK_STATUS_IDS:
+            return jsonify({"error": f"At most {MAX_BULK_STATUS_IDS} ids per request"}), 400
+        ids = sorted(set(ids))
+    else:
+        try:
+            conditions, params = bulk_status_filter(payload["filter"])
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+
+    guard = " AND status = %s" if expected is not None else ""
+    guard_params = [expected] if expected is not None else []
+    matched = updated = 0
+    try:
+        db = get_db()
+        cur = db.cursor(dictionary=True)
+        if ids is not None:
+            total = len(ids)
+            for start in range(0, total, BULK_STATUS_CHUNK_SIZE):
+                chunk = ids[start:start + BULK_STATUS_CHUNK_SIZE]
+                rows, changed = transition_chunk(
+                    db, cur, "id IN (" + ", ".join(["%s"] * len(chunk)) + ")" + guard, chunk + guard_params, status
+                )
+                matched += len(rows)
+                updated += changed
+        else:
+            # Find each chunk with a plain read in (created_at, id) order, which the
+            # (status, created_at, id) and (created_at, id) indexes return without
+            # sorting, then lock just those rows by primary key. Locking the walk
+            # itself would lock every row it scanned or sorted, not just the chunk.
+            where = " AND ".join(conditions) + guard
+            position = None
+            while True:
+                keyset, keyset_params = after_position(position)
+                cur.execute(
+                    f"SELECT id, created_at FROM orders WHERE {where}{keyset} ORDER BY created_at, id LIMIT %s",
+                    params + guard_params + keyset_params + [BULK_STATUS_CHUNK_SIZE],
+                )
+                candidates = cur.fetchall()
+                if candidates:
+                    chunk = [row["id"] for row in candidates]
+                    # The filter is checked again under the lock in case an order changed since the read
+                    rows, changed = transition_chunk(
+                        db,
+                        cur,
+                        "id IN (" + ", ".join(["%s"] * len(chunk)) + ") AND " + where,
+                        chunk + params + guard_params,
+                        status,
+                    )
+                    matched += len(rows)
+                    updated += changed
+                if len(candidates) < BULK_STATUS_CHUNK_SIZE:
+                    break
+                position = (candidates[-1]["created_at"], candidates[-1]["id"])
+            db.commit()
+            total = matched
+        cur.close()
+        db.close()
+    except Error as exc:
+        return jsonify({"error": str(exc), "updated": updated}), 500
+
+    return jsonify({"status": status, "matched": matched, "updated": updated, "skipped": total - updated}), 200
+
+
 @app.route("/orders/<int:order_id>/status", methods=["PUT"])
 def update_order_status(order_id):
     """Update order status"""
@@ -181,25 +919,32 @@ def update_order_status(order_id):
     if not payload or "status" not in payload:
         return jsonify({"error": "Status is required"}), 400
 
-    valid_statuses = ["created", "pending", "processing", "shipped", "delivered", "cancelled"]
     status = payload["status"]
 
-    if status not in valid_statuses:
+    if status not in VALID_STATUSES:
         return jsonify(
-            {"error": f"Invalid status. Valid values: {', '.join(valid_statuses)}"}
+            {"error": f"Invalid status. Valid values: {', '.join(VALID_STATUSES)}"}
         ), 400
 
     try:
         db = get_db()
-        cur = db.cursor()
-        cur.execute("UPDATE orders SET status = %s WHERE id = %s", (status, order_id))
-        db.commit()
-
-        if cur.rowcount == 0:
+        cur = db.cursor(dictionary=True)
+        cur.execute(
+            "SELECT status, product_id, quantity, total_price, created_at FROM orders WHERE id = %s FOR UPDATE",
+            (order_id,),
+        )
+        order = cur.fetchone()
+        if not order:
             cur.close()
             db.close()
             return jsonify({"error": "Order not found"}), 404
 
+        cur.execute("UPDATE orders SET status = %s WHERE id = %s", (status, order_id))
+        sign = counts_in_stats(status) - counts_in_stats(order["status"])
+        if sign:
+            apply_stats_delta(cur, order, sign)
+        db.commit()
+
         cur.close()
         db.close()
         return jsonify({"message": "Order status updated", "status": status}), 200
@@ -207,5 +952,258 @@ def update_order_status(order_id):
         return jsonify({"error": str(exc)}), 500
 
 
+def counts_in_stats(status):
+    """Cancelled orders are left out of the sales aggregates."""
+    return 0 if status == "cancelled" else 1
+
+
+def apply_stats_delta(cur, order, sign):
+    """Add (sign=1) or remove (sign=-1) an order from the aggregates in the caller's transaction."""
+    created_at = order["created_at"]
+    day = created_at.date() if isinstance(created_at, datetime) else created_at
+    delta = (sign, sign * order["quantity"], sign * order["total_price"])
+    cur.execute(
+        "INSERT INTO order_stats_daily (day, order_count, quantity, revenue) VALUES (%s, %s, %s, %s) AS d "
+        "ON DUPLICATE KEY UPDATE order_count = order_count + d.order_count, "
+        "quantity = quantity + d.quantity, revenue = revenue + d.revenue",
+        (day,) + delta,
+    )
+    cur.execute(
+        "INSERT INTO order_stats_product (product_id, order_count, quantity, revenue) VALUES (%s, %s, %s, %s) AS d "
+        "ON DUPLICATE KEY UPDATE order_count = order_count + d.order_count, "
+        "quantity = quantity + d.quantity, revenue = revenue + d.revenue",
+        (order["product_id"],) + delta,
+    )
+
+
+def apply_stats_deltas(cur, changes):
+    """
+    Batch form of apply_stats_delta for (order, sign) pairs: the deltas are
+    summed per day and per product and written with one upsert per table.
+    """
+    daily = {}
+    per_product = {}
+    for order, sign in changes:
+        created_at = order["created_at"]
+        day = created_at.date() if isinstance(created_at, datetime) else created_at
+        delta = (sign, sign * order["quantity"], sign * order["total_price"])
+        for totals, key in ((daily, day), (per_product, order["product_id"])):
+            current = totals.get(key, (0, 0, 0))
+            totals[key] = tuple(a + b for a, b in zip(current, delta))
+    for table, key_column, totals in (
+        ("order_stats_daily", "day", daily),
+        ("order_stats_product", "product_id", per_product),
+    ):
+        if not totals:
+            continue
+        cur.execute(
+            f"INSERT INTO {table} ({key_column}, order_count, quantity, revenue) VALUES "
+            + ", ".join(["(%s, %s, %s, %s)"] * len(totals))
+            + " AS d ON DUPLICATE KEY UPDATE order_count = order_count + d.order_count, "
+            "quantity = quantity + d.quantity, revenue = revenue + d.revenue",
+            [value for key in sorted(totals) for value in (key,) + totals[key]],
+        )
+
+
+ALL_ORDERS = (
+    "(SELECT product_id, quantity, status, total_price, created_at FROM orders "
+    "UNION ALL SELECT product_id, quantity, status, total_price, created_at FROM orders_history) o"
+)
+
+
+def rebuild_order_stats(db):
+    """Recompute the sales aggregates from live and archived orders in one transaction."""
+    cur = db.cursor()
+    try:
+        cur.execute("DELETE FROM order_stats_daily")
+        cur.execute(
+            "INSERT INTO order_stats_daily (day, order_count, quantity, revenue) "
+            "SELECT DATE(created_at), COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(total_price), 0) "
+            f"FROM {ALL_ORDERS} WHERE status <> 'cancelled' GROUP BY DATE(created_at)"
+        )
+        cur.execute("DELETE FROM order_stats_product")
+        cur.execute(
+            "INSERT INTO order_stats_product (product_id, order_count, quantity, revenue) "
+            "SELECT product_id, COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(total_price), 0) "
+            f"FROM {ALL_ORDERS} WHERE status <> 'cancelled' GROUP BY product_id"
+        )
+        db.commit()
+    except Error:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+@app.cli.command("rebuild-stats")
+def rebuild_stats_command():
+    """Recompute order_stats_daily and order_stats_product from orders."""
+    try:
+        db = db_pool.acquire()
+        try:
+            rebuild_order_stats(db)
+        finally:
+            db.close()
+    except Error as exc:
+        raise click.ClickException(f"Rebuilding order stats failed: {exc}")
+    click.echo("Order stats rebuilt")
+
+
+ARCHIVE_STATUSES = ("delivered", "cancelled")
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ORDERS_ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_CHUNK_SIZE = int(os.environ.get("ORDERS_ARCHIVE_CHUNK_SIZE", "1000"))
+ORDER_COLUMNS = "id, user_id, product_id, quantity, status, total_price, created_at"
+
+
+def archive_orders(db, older_than_days=ARCHIVE_AFTER_DAYS, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """
+    Move delivered and cancelled orders created more than older_than_days ago
+    into orders_history, chunk_size orders per transaction.
+
+    Candidates are found one status at a time with plain reads that walk
+    idx_orders_status_created_at_id in (created_at, id) order. Each chunk then
+    locks only its own rows, by primary key with the predicate checked again,
+    copies them and deletes them before committing. A failure never loses or
+    duplicates an order, and live status updates only wait on the chunk being
+    moved. The sales aggregates are left alone: they already count these
+    orders. Returns the number of orders archived.
+    """
+    archived = 0
+    cur = db.cursor()
+    try:
+        for status in ARCHIVE_STATUSES:
+            position = None
+            while True:
+                keyset, keyset_params = after_position(position)
+                cur.execute(
+                    "SELECT id, created_at FROM orders WHERE status = %s "
+                    f"AND created_at < NOW() - INTERVAL %s DAY{keyset} ORDER BY created_at, id LIMIT %s",
+                    [status, older_than_days] + keyset_params + [chunk_size],
+                )
+                candidates = cur.fetchall()
+                if candidates:
+                    id_list = ", ".join(["%s"] * len(candidates))
+                    cur.execute(
+                        f"SELECT id FROM orders WHERE id IN ({id_list}) AND status = %s "
+                        "AND created_at < NOW() - INTERVAL %s DAY FOR UPDATE",
+                        [row[0] for row in candidates] + [status, older_than_days],
+                    )
+                    ids = [row[0] for row in cur.fetchall()]
+                    if ids:
+                        id_list = ", ".join(["%s"] * len(ids))
+                        cur.execute(
+                            f"INSERT INTO orders_history ({ORDER_COLUMNS}) "
+                            f"SELECT {ORDER_COLUMNS} FROM orders WHERE id IN ({id_list})",
+                            ids,
+                        )
+                        cur.execute(f"DELETE FROM orders WHERE id IN ({id_list})", ids)
+                        archived += len(ids)
+                db.commit()
+                if len(candidates) < chunk_size:
+                    break
+                position = candidates[-1][1], candidates[-1][0]
+        return archived
+    except Error:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+@app.cli.command("archive-orders")
+@click.option("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS, show_default=True)
+@click.option("--chunk-size", type=int, default=ARCHIVE_CHUNK_SIZE, show_default=True)
+def archive_orders_command(older_than_days, chunk_size):
+    """Move old delivered and cancelled orders into orders_history."""
+    try:
+        db = db_pool.acquire()
+        try:
+            archived = archive_orders(db, older_than_days, chunk_size)
+        finally:
+            db.close()
+    except Error as exc:
+        # Chunks committed before the failure stay archived; rerunning picks up the rest
+        raise click.ClickException(f"Archiving orders failed: {exc}")
+    click.echo(f"Archived {archived} orders")
+
+
+@app.route("/orders/stats/daily", methods=["GET"])
+def daily_stats():
+    """Orders, units and revenue per day from the summary table (?from= and ?to= are dates)"""
+    conditions = []
+    params = []
+    try:
+        start = parse_datetime_arg(request.args, "from")
+        end = parse_datetime_arg(request.args, "to")
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    if start is not None:
+        conditions.append("day >= %s")
+        params.append(start.date())
+    if end is not None:
+        conditions.append("day < %s")
+        params.append(end.date())
+
+    try:
+        db = get_db()
+        cur = db.cursor(dictionary=True)
+        cur.execute(
+            "SELECT day, order_count, quantity, revenue FROM order_stats_daily "
+            + where_clause(conditions)
+            + " ORDER BY day",
+            params,
+        )
+        rows = cur.fetchall()
+        cur.close()
+        db.close()
+        return jsonify([dict(row, day=row["day"].isoformat(), revenue=float(row["revenue"])) for row in rows]), 200
+    except Error as exc:
+        return jsonify({"error": str(exc)}), 500
+
+
+@app.route("/orders/stats/top-products", methods=["GET"])
+def top_products():
+    """Best-selling products by revenue from the summary table (?n= defaults to 10)"""
+    try:
+        n = int(request.args.get("n", 10))
+        if n < 1 or n > MAX_PAGE_SIZE:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": f"n must be between 1 and {MAX_PAGE_SIZE}"}), 400
+
+    try:
+        db = get_db()
+        cur = db.cursor(dictionary=True)
+        cur.execute(
+            """
+            SELECT s.product_id, p.name as product_name, s.order_count, s.quantity, s.revenue
+            FROM order_stats_product s
+            JOIN products p ON s.product_id = p.id
+            ORDER BY s.revenue DESC
+            LIMIT %s
+            """,
+            (n,),
+        )
+        rows = cur.fetchall()
+        cur.close()
+        db.close()
+        return jsonify([dict(row, revenue=float(row["revenue"])) for row in rows]), 200
+    except Error as exc:
+        return jsonify({"error": str(exc)}), 500
+
+
+def migrate():
+    """Apply pending schema migrations; called once before serving."""
+    db = db_pool.acquire()
+    try:
+        return run_migrations(db, "orders")
+    finally:
+        db.close()
+
+
 if __name__ == "__main__":
+    migrate()
+    start_pool(db_pool)
+    if PRICE_REPLICA:
+        price_replica.start(db_pool)
     app.run(host="0.0.0.0", port=5003, debug=False)
@@ -0,0 +1,266 @@
+"""
+Pooled MySQL connections for the Flask services.
+
+Each service keeps one ConnectionPool per process. Request handlers call
+get_db() as before; the pool hands out a PooledConnection that is bound to
+the Flask app context and returned to the pool on close() or at teardown.
+
+This module is kept identical in users-service, products-service and
+orders-service because each service is built from its own directory.
+"""
+import atexit
+import os
+import threading
+import time
+from collections import deque
+
+from flask import g
+from mysql.connector.errors import PoolError
+
+
+class PoolTimeout(PoolError):
+    """Raised when no connection became available within the checkout timeout."""
+
+
+class PooledConnection:
+    """Proxy around a raw connection; close() returns it to the pool."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self.closed = False
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._pool.release(self._conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class ConnectionPool:
+    """
+    Thread-safe bounded connection pool.
+
+    - min_size connections are kept open even when idle
+    - at most max_size connections exist at any time; callers wait up to
+      timeout seconds for one to be released
+    - connections idle longer than idle_timeout are closed (above min_size)
+    - pre_ping validates a connection before handing it out if it has been
+      idle longer than ping_after seconds; recently used ones skip the round trip
+    """
+
+    def __init__(
+        self, connect, min_size=1, max_size=10, timeout=5.0, idle_timeout=300.0, pre_ping=True, ping_after=30.0
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("require 0 <= min_size <= max_size and max_size >= 1")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.pre_ping = pre_ping
+        self.ping_after = ping_after
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, released_at); newest on the right
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._counters = {
+            "created": 0,
+            "discarded": 0,
+            "evicted": 0,
+            "checkouts": 0,
+            "timeouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def _new_connection(self):
+        """Open a connection for a slot already reserved in self._size."""
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._counters["created"] += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:  # nosec B110 - connection is being discarded anyway
+            pass
+
+    def _evict_idle_locked(self, now):
+        """Pop connections idle past idle_timeout; caller closes them outside the lock."""
+        evicted = []
+        while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._counters["evicted"] += 1
+            evicted.append(conn)
+        return evicted
+
+    def warm(self):
+        """Open connections until min_size exist."""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            conn = self._new_connection()
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def acquire(self):
+        """Check out a connection, waiting up to self.timeout seconds."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            conn = None
+            released_at = None
+            create = False
+            with self._cond:
+                evicted = self._evict_idle_locked(time.monotonic())
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counters["timeouts"] += 1
+                        raise PoolTimeout(
+                            "no connection available within %.1fs (max_size=%d)" % (self.timeout, self.max_size)
+                        )
+                    waited = True
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+                self._in_use += 1
+            for stale in evicted:
+                self._close_quietly(stale)
+
+            try:
+                if create:
+                    conn = self._new_connection()
+                elif (
+                    self.pre_ping
+                    and time.monotonic() - released_at > self.ping_after
+                    and not conn.is_connected()
+                ):
+                    self._discard(conn)
+                    continue
+            except Exception:
+                with self._cond:
+                    self._in_use -= 1
+                raise
+
+            with self._cond:
+                self._counters["checkouts"] += 1
+                if waited:
+                    wait = time.monotonic() - started
+                    self._counters["waits"] += 1
+                    self._counters["wait_time_total"] += wait
+                    self._counters["wait_time_max"] = max(self._counters["wait_time_max"], wait)
+            return PooledConnection(self, conn)
+
+    def _discard(self, conn):
+        """Drop a checked-out connection that turned out to be unusable."""
+        self._close_quietly(conn)
+        with self._cond:
+            self._in_use -= 1
+            self._size -= 1
+            self._counters["discarded"] += 1
+            self._cond.notify()
+
+    def release(self, conn):
+        """Return a raw connection to the pool, rolling back any open transaction."""
+        try:
+            # Skip the ROLLBACK round trip when the handler already committed
+            if getattr(conn, "in_transaction", True):
+                conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection; checked-out ones close when released."""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """Snapshot of pool gauges and counters for monitoring."""
+        with self._cond:
+            data = dict(self._counters)
+            data.update(
+                {
+                    "size": self._size,
+                    "idle": len(self._idle),
+                    "in_use": self._in_use,
+                    "waiting": self._waiting,
+                    "min_size": self.min_size,
+                    "max_size": self.max_size,
+                }
+            )
+        data["wait_time_avg"] = data["wait_time_total"] / data["waits"] if data["waits"] else 0.0
+        return data
+
+
+def pool_from_env(connect):
+    """Build a ConnectionPool sized from DB_POOL_* environment variables."""
+    return ConnectionPool(
+        connect,
+        min_size=int(os.environ.get("DB_POOL_MIN", "1")),
+        max_size=int(os.environ.get("DB_POOL_MAX", "10")),
+        timeout=float(os.environ.get("DB_POOL_TIMEOUT", "5")),
+        idle_timeout=float(os.environ.get("DB_POOL_IDLE_TIMEOUT", "300")),
+        pre_ping=os.environ.get("DB_POOL_PRE_PING", "1") != "0",
+        ping_after=float(os.environ.get("DB_POOL_PING_AFTER", "30")),
+    )
+
+
+def start_pool(pool):
+    """Open the pool's min_size connections before serving and close idle ones at exit."""
+    pool.warm()
+    atexit.register(pool.close_all)
+
+
+def checkout(pool):
+    """Return the connection bound to the current app context, checking one out if needed."""
+    conn = g.get("_db_conn")
+    if conn is None or conn.closed:
+        conn = pool.acquire()
+        g._db_conn = conn
+    return conn
+
+
+def init_app(app):
+    """Release the app-context connection at teardown."""
+
+    @app.teardown_appcontext
+    def _release_db(exc):
+        conn = g.pop("_db_conn", None)
+        if conn is not None:
+            conn.close()
@@ -0,0 +1,189 @@
+"""
+Group commit for high-volume order intake.
+
+Request threads submit() an order and block while a single background thread
+collects submissions until max_batch orders are waiting or max_delay seconds
+have passed since the first one, then hands the whole batch to flush(),
+which writes it with one INSERT and one COMMIT. Each waiting request is then
+completed with its own result.
+
+A request that times out cancels its order if the flush has not picked it
+up yet (IntakeTimeout: the order is never written). Once the flush has
+started the order may still commit, so the request gets OutcomeUnknown
+instead and must not blindly retry.
+"""
+import queue
+import threading
+import time
+
+
+class IntakeFull(Exception):
+    """Raised by submit() when the intake queue is at max_queue."""
+
+
+class IntakeTimeout(Exception):
+    """Raised by submit() when the order timed out before being flushed; it will not be written."""
+
+
+class OutcomeUnknown(Exception):
+    """Raised by submit() when the order timed out while its batch was being written."""
+
+
+class PendingOrder:
+    """One submitted order waiting for its batch to be flushed."""
+
+    def __init__(self, order):
+        self.order = order
+        self.enqueued_at = time.monotonic()
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self._started = False
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def cancel(self):
+        """Withdraw the order unless a flush has already taken it; True if cancelled."""
+        with self._lock:
+            if not self._started:
+                self.cancelled = True
+            return self.cancelled
+
+    def claim(self):
+        """Mark the order as being flushed; False if it was cancelled first."""
+        with self._lock:
+            if not self.cancelled:
+                self._started = True
+            return self._started
+
+    def complete(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self._done.set()
+
+    def wait(self, timeout):
+        return self._done.wait(timeout)
+
+
+class OrderBatcher:
+    """
+    Collects orders from many threads and flushes them in batches.
+
+    flush(orders) receives a list of order dicts and must return one result
+    per order, in the same order; if it raises, every order in the batch
+    fails with that exception.
+    """
+
+    def __init__(self, flush, max_batch=100, max_delay=0.005, max_queue=10000):
+        self._flush = flush
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._metrics = {
+            "submitted": 0,
+            "rejected": 0,
+            "cancelled": 0,
+            "outcome_unknown": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "flushed_orders": 0,
+            "flush_size_max": 0,
+            "flush_time_total": 0.0,
+            "flush_time_max": 0.0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+        }
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="order-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, order, timeout=10.0):
+        """
+        Queue order and block until its batch is committed; return its result.
+
+        Raises IntakeFull or IntakeTimeout when the order was not written, and
+        OutcomeUnknown when it timed out mid-flush and may have been.
+        """
+        self.start()
+        pending = PendingOrder(order)
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            with self._lock:
+                self._metrics["rejected"] += 1
+            raise IntakeFull("order intake queue is full")
+        with self._lock:
+            self._metrics["submitted"] += 1
+        if not pending.wait(timeout):
+            if pending.cancel():
+                with self._lock:
+                    self._metrics["cancelled"] += 1
+                raise IntakeTimeout("order was not written within %.1fs" % timeout)
+            with self._lock:
+                self._metrics["outcome_unknown"] += 1
+            raise OutcomeUnknown("order was still being written after %.1fs" % timeout)
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            self.flush_batch(self._collect())
+
+    def flush_batch(self, batch):
+        """Flush a list of PendingOrder and complete each one; cancelled orders are skipped."""
+        batch = [pending for pending in batch if pending.claim()]
+        if not batch:
+            return
+        started = time.monotonic()
+        try:
+            results = self._flush([pending.order for pending in batch])
+            error = None
+        except Exception as exc:  # every waiter gets the failure
+            results = [None] * len(batch)
+            error = exc
+        elapsed = time.monotonic() - started
+
+        with self._lock:
+            metrics = self._metrics
+            metrics["flushes"] += 1
+            metrics["failed_flushes"] += error is not None
+            metrics["flushed_orders"] += len(batch)
+            metrics["flush_size_max"] = max(metrics["flush_size_max"], len(batch))
+            metrics["flush_time_total"] += elapsed
+            metrics["flush_time_max"] = max(metrics["flush_time_max"], elapsed)
+            for pending in batch:
+                wait = started - pending.enqueued_at
+                metrics["queue_wait_total"] += wait
+                metrics["queue_wait_max"] = max(metrics["queue_wait_max"], wait)
+
+        for pending, result in zip(batch, results):
+            pending.complete(result, error)
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._metrics)
+        flushes = data["flushes"]
+        data["queue_depth"] = self._queue.qsize()
+        data["flush_size_avg"] = data["flushed_orders"] / flushes if flushes else 0.0
+        data["flush_time_avg"] = data["flush_time_total"] / flushes if flushes else 0.0
+        data["queue_wait_avg"] = data["queue_wait_total"] / data["flushed_orders"] if data["flushed_orders"] else 0.0
+        return data
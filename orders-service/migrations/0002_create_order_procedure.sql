@@ -0,0 +1,22 @@
+-- Creates an order in one round trip: checks the user, prices the product and
+-- inserts the row, returning (error, id, total_price). The caller commits.
+DROP PROCEDURE IF EXISTS create_order;
+DELIMITER $$
+CREATE PROCEDURE create_order(IN p_user_id INT, IN p_product_id INT, IN p_quantity INT)
+BEGIN
+  DECLARE v_price DECIMAL(10, 2) DEFAULT NULL;
+
+  IF NOT EXISTS (SELECT 1 FROM users WHERE id = p_user_id) THEN
+    SELECT 'user_not_found' AS error, NULL AS id, NULL AS total_price;
+  ELSE
+    SELECT price INTO v_price FROM products WHERE id = p_product_id;
+    IF v_price IS NULL THEN
+      SELECT 'product_not_found' AS error, NULL AS id, NULL AS total_price;
+    ELSE
+      INSERT INTO orders (user_id, product_id, quantity, status, total_price)
+      VALUES (p_user_id, p_product_id, p_quantity, 'created', v_price * p_quantity);
+      SELECT NULL AS error, LAST_INSERT_ID() AS id, v_price * p_quantity AS total_price;
+    END IF;
+  END IF;
+END$$
+DELIMITER ;
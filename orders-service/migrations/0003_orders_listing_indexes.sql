@@ -0,0 +1,3 @@
+-- Keyset pagination on GET /orders: newest first, optionally filtered by status
+CREATE INDEX idx_orders_created_at_id ON orders (created_at, id);
+CREATE INDEX idx_orders_status_created_at_id ON orders (status, created_at, id);
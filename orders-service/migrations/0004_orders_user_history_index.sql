@@ -0,0 +1,2 @@
+-- Per-user order history (GET /orders/user/<id>): filter by user, newest first
+CREATE INDEX idx_orders_user_created_at_id ON orders (user_id, created_at, id);
@@ -0,0 +1,58 @@
+-- Sales aggregates kept current by create_order and status updates, in the
+-- same transaction as the order write. Cancelled orders are not counted.
+CREATE TABLE IF NOT EXISTS order_stats_daily (
+  day DATE PRIMARY KEY,
+  order_count INT NOT NULL DEFAULT 0,
+  quantity INT NOT NULL DEFAULT 0,
+  revenue DECIMAL(14, 2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS order_stats_product (
+  product_id INT PRIMARY KEY,
+  order_count INT NOT NULL DEFAULT 0,
+  quantity INT NOT NULL DEFAULT 0,
+  revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+  INDEX idx_order_stats_product_revenue (revenue)
+);
+
+-- Seed from existing orders; later drift can be fixed with `flask --app app rebuild-stats`
+INSERT INTO order_stats_daily (day, order_count, quantity, revenue)
+SELECT DATE(created_at), COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(total_price), 0)
+FROM orders WHERE status <> 'cancelled' GROUP BY DATE(created_at);
+INSERT INTO order_stats_product (product_id, order_count, quantity, revenue)
+SELECT product_id, COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(total_price), 0)
+FROM orders WHERE status <> 'cancelled' GROUP BY product_id;
+
+-- create_order now also bumps the aggregates for the new order
+DROP PROCEDURE IF EXISTS create_order;
+DELIMITER $$
+CREATE PROCEDURE create_order(IN p_user_id INT, IN p_product_id INT, IN p_quantity INT)
+BEGIN
+  DECLARE v_price DECIMAL(10, 2) DEFAULT NULL;
+  DECLARE v_now TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+  IF NOT EXISTS (SELECT 1 FROM users WHERE id = p_user_id) THEN
+    SELECT 'user_not_found' AS error, NULL AS id, NULL AS total_price;
+  ELSE
+    SELECT price INTO v_price FROM products WHERE id = p_product_id;
+    IF v_price IS NULL THEN
+      SELECT 'product_not_found' AS error, NULL AS id, NULL AS total_price;
+    ELSE
+      INSERT INTO orders (user_id, product_id, quantity, status, total_price, created_at)
+      VALUES (p_user_id, p_product_id, p_quantity, 'created', v_price * p_quantity, v_now);
+      SELECT NULL AS error, LAST_INSERT_ID() AS id, v_price * p_quantity AS total_price;
+
+      INSERT INTO order_stats_daily (day, order_count, quantity, revenue)
+      VALUES (DATE(v_now), 1, p_quantity, v_price * p_quantity)
+      ON DUPLICATE KEY UPDATE order_count = order_count + 1,
+                              quantity = quantity + p_quantity,
+                              revenue = revenue + v_price * p_quantity;
+      INSERT INTO order_stats_product (product_id, order_count, quantity, revenue)
+      VALUES (p_product_id, 1, p_quantity, v_price * p_quantity)
+      ON DUPLICATE KEY UPDATE order_count = order_count + 1,
+                              quantity = quantity + p_quantity,
+                              revenue = revenue + v_price * p_quantity;
+    END IF;
+  END IF;
+END$$
+DELIMITER ;
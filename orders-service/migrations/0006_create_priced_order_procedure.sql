@@ -0,0 +1,31 @@
+-- create_order for callers that already know the product's price (from the
+-- in-memory price replica): it skips the products lookup. A product deleted
+-- since the replica saw it makes the INSERT fail its foreign key, which the
+-- service reports as product_not_found.
+DROP PROCEDURE IF EXISTS create_priced_order;
+DELIMITER $$
+CREATE PROCEDURE create_priced_order(IN p_user_id INT, IN p_product_id INT, IN p_quantity INT,
+                                     IN p_price DECIMAL(10, 2))
+BEGIN
+  DECLARE v_now TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+  IF NOT EXISTS (SELECT 1 FROM users WHERE id = p_user_id) THEN
+    SELECT 'user_not_found' AS error, NULL AS id, NULL AS total_price;
+  ELSE
+    INSERT INTO orders (user_id, product_id, quantity, status, total_price, created_at)
+    VALUES (p_user_id, p_product_id, p_quantity, 'created', p_price * p_quantity, v_now);
+    SELECT NULL AS error, LAST_INSERT_ID() AS id, p_price * p_quantity AS total_price;
+
+    INSERT INTO order_stats_daily (day, order_count, quantity, revenue)
+    VALUES (DATE(v_now), 1, p_quantity, p_price * p_quantity)
+    ON DUPLICATE KEY UPDATE order_count = order_count + 1,
+                            quantity = quantity + p_quantity,
+                            revenue = revenue + p_price * p_quantity;
+    INSERT INTO order_stats_product (product_id, order_count, quantity, revenue)
+    VALUES (p_product_id, 1, p_quantity, p_price * p_quantity)
+    ON DUPLICATE KEY UPDATE order_count = order_count + 1,
+                            quantity = quantity + p_quantity,
+                            revenue = revenue + p_price * p_quantity;
+  END IF;
+END$$
+DELIMITER ;
@@ -0,0 +1,17 @@
+-- Archive for finished orders moved out of the hot orders table by
+-- `flask --app app archive-orders`. Rows keep their order id. There are no
+-- foreign keys, so archiving never takes locks on users or products. The
+-- indexes mirror the listing indexes on orders.
+CREATE TABLE IF NOT EXISTS orders_history (
+  id INT PRIMARY KEY,
+  user_id INT NOT NULL,
+  product_id INT NOT NULL,
+  quantity INT DEFAULT 1,
+  status VARCHAR(50),
+  total_price DECIMAL(10, 2),
+  created_at TIMESTAMP NULL,
+  archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_orders_history_created_at_id (created_at, id),
+  INDEX idx_orders_history_status_created_at_id (status, created_at, id),
+  INDEX idx_orders_history_user_created_at_id (user_id, created_at, id)
+);
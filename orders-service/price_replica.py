@@ -0,0 +1,182 @@
+"""
+In-memory copy of product names and prices for pricing orders.
+
+The replica is loaded from a consistent snapshot of products and then kept
+current from the product_changes feed that products-service's triggers
+append to, stamped with the catalog version. A background thread refreshes
+it every refresh_interval seconds; lookup() only answers while the last
+successful refresh is younger than max_staleness, so callers fall back to
+reading MySQL whenever the replica is missing a product or has gone stale.
+
+The thread also records the version it has applied in
+product_change_consumers under its consumer name, which is what lets
+products-service prune the feed. If the feed has been pruned past the
+replica's version it reloads from products.
+"""
+import threading
+import time
+
+
+class PriceReplica:
+    """Thread-safe {product id: (name, price)} map fed by product_changes."""
+
+    def __init__(self, refresh_interval=1.0, max_staleness=5.0, consumer=None, report_interval=60.0):
+        self.refresh_interval = refresh_interval
+        self.max_staleness = max_staleness
+        self.consumer = consumer
+        self.report_interval = report_interval
+        self._lock = threading.Lock()
+        self._products = {}
+        self._version = None
+        self._refreshed_at = None
+        self._reported = (None, None)  # (version, monotonic time) last written to product_change_consumers
+        self._thread = None
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "loads": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "changes_applied": 0,
+            "reports": 0,
+            "report_errors": 0,
+        }
+
+    @staticmethod
+    def _read_version(cur):
+        """Return (catalog version, highest version pruned from product_changes)."""
+        cur.execute("SELECT version, changes_pruned_to FROM catalog_version WHERE id = 1")
+        row = cur.fetchone()
+        return (row[0], row[1]) if row else (0, 0)
+
+    def load(self, db):
+        """Replace the map with a snapshot of products and the catalog version it reflects."""
+        db.start_transaction(consistent_snapshot=True, readonly=True)
+        cur = db.cursor()
+        try:
+            version, _ = self._read_version(cur)
+            cur.execute("SELECT id, name, price FROM products")
+            products = {row[0]: (row[1], row[2]) for row in cur.fetchall()}
+        finally:
+            cur.close()
+            db.rollback()
+        with self._lock:
+            self._products = products
+            self._version = version
+            self._refreshed_at = time.monotonic()
+            self._counters["loads"] += 1
+
+    def refresh(self, db):
+        """Apply changes committed since the last load or refresh; loads first if needed."""
+        with self._lock:
+            since = self._version
+        if since is None:
+            return self.load(db)
+
+        db.start_transaction(consistent_snapshot=True, readonly=True)
+        cur = db.cursor()
+        try:
+            version, pruned_to = self._read_version(cur)
+            changes = []
+            if pruned_to <= since < version:
+                cur.execute(
+                    "SELECT product_id, name, price, deleted FROM product_changes "
+                    "WHERE version > %s AND version <= %s ORDER BY version, seq",
+                    (since, version),
+                )
+                changes = cur.fetchall()
+        finally:
+            cur.close()
+            db.rollback()
+
+        if version < since or since < pruned_to:
+            # catalog_version was reset, or changes we have not applied were pruned
+            return self.load(db)
+        with self._lock:
+            if self._version != since:
+                return  # a concurrent load or refresh won; the next refresh catches up
+            for product_id, name, price, deleted in changes:
+                if deleted:
+                    self._products.pop(product_id, None)
+                else:
+                    self._products[product_id] = (name, price)
+            self._version = version
+            self._refreshed_at = time.monotonic()
+            self._counters["refreshes"] += 1
+            self._counters["changes_applied"] += len(changes)
+
+    def lookup(self, product_id):
+        """Return (name, price), or None if the product is unknown or the replica is stale."""
+        with self._lock:
+            if self._refreshed_at is None or time.monotonic() - self._refreshed_at > self.max_staleness:
+                self._counters["stale"] += 1
+                return None
+            entry = self._products.get(product_id)
+            self._counters["hits" if entry else "misses"] += 1
+            return entry
+
+    def forget(self, product_id):
+        """Drop a product the database says is gone, ahead of its change arriving."""
+        with self._lock:
+            self._products.pop(product_id, None)
+
+    def report(self, db):
+        """Record the applied version in product_change_consumers when it moved or report_interval passed."""
+        with self._lock:
+            version = self._version
+            reported_version, reported_at = self._reported
+        now = time.monotonic()
+        if self.consumer is None or version is None:
+            return
+        if version == reported_version and now - reported_at < self.report_interval:
+            return
+        cur = db.cursor()
+        try:
+            cur.execute(
+                "INSERT INTO product_change_consumers (consumer, version) VALUES (%s, %s) AS new "
+                "ON DUPLICATE KEY UPDATE version = new.version, updated_at = CURRENT_TIMESTAMP",
+                (self.consumer, version),
+            )
+            db.commit()
+        finally:
+            cur.close()
+        with self._lock:
+            self._reported = (version, now)
+            self._counters["reports"] += 1
+
+    def start(self, pool):
+        """Keep the replica refreshed from a background thread using connections from pool."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, args=(pool,), name="price-replica", daemon=True)
+            self._thread.start()
+
+    def _run(self, pool):
+        while True:
+            try:
+                db = pool.acquire()
+                try:
+                    self.refresh(db)
+                    try:
+                        self.report(db)
+                    except Exception:  # only delays pruning; the replica itself is current
+                        with self._lock:
+                            self._counters["report_errors"] += 1
+                finally:
+                    db.close()
+            except Exception:  # keep refreshing; lookups go stale and fall back meanwhile
+                with self._lock:
+                    self._counters["refresh_errors"] += 1
+            time.sleep(self.refresh_interval)
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._counters)
+            data["products"] = len(self._products)
+            data["version"] = self._version
+            data["age"] = time.monotonic() - self._refreshed_at if self._refreshed_at is not None else None
+        data["max_staleness"] = self.max_staleness
+        data["consumer"] = self.consumer
+        return data
@@ -0,0 +1,92 @@
+"""
+Constant-memory JSON streaming of query results.
+
+A listing is streamed when the client asks for NDJSON through Accept or passes
+?stream=1. Rows are pulled from an unbuffered cursor in fetchmany() batches and
+encoded one at a time, either as a chunked JSON array or as NDJSON. Exports
+can additionally be gzip-compressed on the fly.
+
+This module is kept identical in products-service and orders-service.
+"""
+import os
+import zlib
+
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON = "application/x-ndjson"
+STREAM_BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", "1000"))
+
+
+def wants_ndjson():
+    return request.accept_mimetypes.best_match(["application/json", NDJSON]) == NDJSON
+
+
+def wants_stream():
+    """True if the client asked for a streamed listing."""
+    return request.args.get("stream") == "1" or wants_ndjson()
+
+
+def wants_gzip():
+    """True if the client accepts a gzip-encoded body."""
+    return request.args.get("gzip") == "1" or request.accept_encodings["gzip"] > 0
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress an iterable of str chunks into gzip bytes as they are produced."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_rows(cur, batch_size=STREAM_BATCH_SIZE):
+    """Yield rows from cur, holding at most batch_size of them at a time."""
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def encode_rows(rows, ndjson):
+    """Yield the encoded chunks for rows as NDJSON lines or one JSON array."""
+    dumps = current_app.json.dumps
+    if ndjson:
+        for row in rows:
+            yield dumps(row) + "\n"
+        return
+    yield "["
+    first = True
+    for row in rows:
+        yield dumps(row) if first else "," + dumps(row)
+        first = False
+    yield "]"
+
+
+def stream_cursor(db, cur, headers=None):
+    """
+    Stream the result set of an executed query on cur as the response body.
+
+    The cursor and connection are closed when the body is exhausted or the
+    client goes away; the app context stays alive until then so the pooled
+    connection is not released underneath the generator.
+    """
+    ndjson = wants_ndjson()
+
+    def generate():
+        try:
+            yield from encode_rows(iter_rows(cur), ndjson)
+        finally:
+            try:
+                cur.close()
+            except Exception:  # nosec B110 - unread rows after a disconnect; the pool discards the connection
+                pass
+            db.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=NDJSON if ndjson else "application/json",
+        headers=headers,
+    )
@@ -0,0 +1,204 @@
+import threading
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import mysql.connector
+import pytest
+
+import app as orders_app
+from group_commit import IntakeFull, IntakeTimeout, OrderBatcher, OutcomeUnknown, PendingOrder
+
+
+def submit_concurrently(batcher, orders):
+    results = [None] * len(orders)
+
+    def worker(i):
+        results[i] = batcher.submit(orders[i], timeout=2)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(orders))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_submissions_share_a_flush():
+    """Orders arriving within max_delay are flushed together"""
+    flushed = []
+
+    def flush(orders):
+        flushed.append(list(orders))
+        return [order * 10 for order in orders]
+
+    batcher = OrderBatcher(flush, max_batch=50, max_delay=0.2)
+    results = submit_concurrently(batcher, list(range(8)))
+
+    assert results == [order * 10 for order in range(8)]
+    assert sum(len(batch) for batch in flushed) == 8
+    assert len(flushed) < 8
+    stats = batcher.stats()
+    assert stats["flushed_orders"] == 8
+    assert stats["flush_size_max"] == max(len(batch) for batch in flushed)
+
+
+def test_flush_error_fails_every_waiter():
+    """A failed flush is reported to every order in the batch"""
+    def flush(orders):
+        raise RuntimeError("boom")
+
+    batcher = OrderBatcher(flush)
+    batch = [PendingOrder(1), PendingOrder(2)]
+    batcher.flush_batch(batch)
+    assert all(isinstance(pending.error, RuntimeError) for pending in batch)
+    assert batcher.stats()["failed_flushes"] == 1
+
+
+def test_full_queue_rejects():
+    """submit() fails fast once the intake queue is full"""
+    batcher = OrderBatcher(lambda orders: orders, max_queue=1)
+    batcher._thread = MagicMock()  # keep the queue from draining
+    batcher._queue.put_nowait(PendingOrder(0))
+    with pytest.raises(IntakeFull):
+        batcher.submit(1)
+    assert batcher.stats()["rejected"] == 1
+
+
+def test_timed_out_order_is_cancelled_before_flush():
+    """An order that times out in the queue is withdrawn and never flushed"""
+    flushed = []
+    batcher = OrderBatcher(lambda orders: flushed.extend(orders) or orders)
+    batcher._thread = MagicMock()  # nothing drains the queue until flush_batch below
+    with pytest.raises(IntakeTimeout):
+        batcher.submit(1, timeout=0.01)
+
+    batcher.flush_batch([batcher._queue.get_nowait(), PendingOrder(2)])
+    assert flushed == [2]
+    assert batcher.stats()["cancelled"] == 1
+
+
+def test_timeout_during_flush_is_outcome_unknown():
+    """An order whose batch is already being written cannot be withdrawn"""
+    writing = threading.Event()
+    release = threading.Event()
+
+    def flush(orders):
+        writing.set()
+        release.wait(2)
+        return orders
+
+    batcher = OrderBatcher(flush, max_delay=0)
+    outcome = []
+
+    def submit():
+        try:
+            batcher.submit(1, timeout=0.2)
+        except OutcomeUnknown:
+            outcome.append("unknown")
+
+    thread = threading.Thread(target=submit)
+    thread.start()
+    assert writing.wait(2)
+    thread.join()
+    release.set()
+    assert outcome == ["unknown"]
+    assert batcher.stats()["outcome_unknown"] == 1
+
+
+def test_insert_order_batch_single_insert_and_commit():
+    """Valid orders share one INSERT; unknown users/products get the procedure's errors"""
+    db = MagicMock()
+    cur = MagicMock()
+    db.cursor.return_value = cur
+    now = datetime(2024, 5, 1, 12, 0)
+    cur.fetchall.side_effect = [
+        [{"id": 1}],
+        [{"id": 7, "price": Decimal("2.50"), "now": now, "step": 1}],
+    ]
+    cur.lastrowid = 100
+
+    results = orders_app.insert_order_batch(
+        db,
+        [
+            {"user_id": 1, "product_id": 7, "quantity": 2},
+            {"user_id": 9, "product_id": 7, "quantity": 1},
+            {"user_id": 1, "product_id": 8, "quantity": 1},
+            {"user_id": 1, "product_id": 7, "quantity": 1},
+        ],
+    )
+
+    assert [r["error"] for r in results] == [None, "user_not_found", "product_not_found", None]
+    assert [results[0]["id"], results[3]["id"]] == [100, 101]
+    assert results[0]["total_price"] == Decimal("5.00")
+    inserts = [c for c in cur.execute.call_args_list if c.args[0].startswith("INSERT INTO orders")]
+    assert len(inserts) == 1
+    assert inserts[0].args[1] == [1, 7, 2, Decimal("5.00"), now, 1, 7, 1, Decimal("2.50"), now]
+    daily = next(c for c in cur.execute.call_args_list if "order_stats_daily" in c.args[0])
+    assert daily.args[1] == (now.date(), 2, 3, Decimal("7.50"))
+    db.commit.assert_called_once()
+
+
+def test_insert_order_batch_falls_back_to_single_rows():
+    """A foreign key failure in the batch INSERT fails only the offending order"""
+    db = MagicMock()
+    cur = MagicMock()
+    db.cursor.return_value = cur
+    now = datetime(2024, 5, 1, 12, 0)
+    cur.fetchall.side_effect = [
+        [{"id": 1}],
+        [
+            {"id": 7, "price": Decimal("2.50"), "now": now, "step": 1},
+            {"id": 8, "price": Decimal("1.00"), "now": now, "step": 1},
+        ],
+    ]
+    deleted = mysql.connector.IntegrityError(
+        msg="Cannot add or update a child row: a foreign key constraint fails (`capstone`.`orders`, "
+        "CONSTRAINT `orders_ibfk_2` FOREIGN KEY (`product_id`) REFERENCES `products` (`id`) ON DELETE CASCADE)",
+        errno=1452,
+    )
+    inserts = []
+
+    def execute(statement, params=None):
+        if statement.startswith("INSERT INTO orders "):
+            inserts.append(params)
+            if len(inserts) == 1 or params[1] == 8:
+                raise deleted
+            cur.lastrowid = 200 + len(inserts)
+
+    cur.execute.side_effect = execute
+
+    results = orders_app.insert_order_batch(
+        db,
+        [{"user_id": 1, "product_id": 7, "quantity": 2}, {"user_id": 1, "product_id": 8, "quantity": 1}],
+    )
+
+    assert results[0] == {"error": None, "id": 202, "total_price": Decimal("5.00")}
+    assert results[1] == {"error": "product_not_found", "id": None, "total_price": None}
+    assert len(inserts) == 3
+    daily = next(c for c in cur.execute.call_args_list if "order_stats_daily" in c.args[0])
+    assert daily.args[1] == (now.date(), 1, 2, Decimal("5.00"))
+    db.commit.assert_called_once()
+
+
+def test_create_order_uses_batcher_when_enabled():
+    """With group commit on, POST /orders goes through the batcher"""
+    client = orders_app.app.test_client()
+    batcher = MagicMock()
+    batcher.submit.return_value = {"error": None, "id": 42, "total_price": Decimal("3.00")}
+    with patch.object(orders_app, "GROUP_COMMIT", True), patch.object(orders_app, "order_batcher", batcher):
+        response = client.post("/orders", json={"user_id": 1, "product_id": 2, "quantity": 3})
+    assert response.status_code == 201
+    assert response.get_json()["id"] == 42
+    batcher.submit.assert_called_once()
+
+    batcher.submit.side_effect = IntakeFull("order intake queue is full")
+    with patch.object(orders_app, "GROUP_COMMIT", True), patch.object(orders_app, "order_batcher", batcher):
+        response = client.post("/orders", json={"user_id": 1, "product_id": 2})
+    assert response.status_code == 503
+
+    batcher.submit.side_effect = OutcomeUnknown("order was still being written after 10.0s")
+    with patch.object(orders_app, "GROUP_COMMIT", True), patch.object(orders_app, "order_batcher", batcher):
+        response = client.post("/orders", json={"user_id": 1, "product_id": 2})
+    assert response.status_code == 504
+    assert response.get_json()["outcome"] == "unknown"
@@ -1,6 +1,11 @@
+import gzip
+import json
+import mysql.connector
 import pytest
+from datetime import datetime
+from decimal import Decimal
 from unittest.mock import patch, MagicMock
-from app import app
+from app import app, decode_cursor, encode_cursor
 
 
 @pytest.fixture
@@ -56,12 +61,10 @@ def test_create_order_success(client, mock_db):
     """Test creating an order successfully"""
     db, cursor = mock_db
 
-    # Mock user check
-    cursor.fetchone.side_effect = [
-        {"id": 1},  # User exists
-        {"id": 1, "price": 9.99},  # Product exists with price
-    ]
-    cursor.lastrowid = 1
+    # create_order procedure result
+    cursor.execute.return_value = iter([cursor])
+    cursor.with_rows = True
+    cursor.fetchall.return_value = [{"error": None, "id": 1, "total_price": Decimal("19.98")}]
 
     response = client.post(
         "/orders",
@@ -75,6 +78,11 @@ def test_create_order_success(client, mock_db):
     data = response.get_json()
     assert data["id"] == 1
     assert data["total_price"] == 19.98
+    statement, params = cursor.execute.call_args.args
+    assert statement == "CALL create_order(%s, %s, %s)"
+    assert params == (1, 1, 2)
+    assert cursor.execute.call_args.kwargs == {"multi": True}
+    db.commit.assert_called_once()
 
 
 def test_create_order_missing_user_id(client):
@@ -120,10 +128,27 @@ def test_create_order_invalid_quantity(client):
     assert "error" in data
 
 
+def test_create_order_rejects_non_integer_ids(client, mock_db):
+    """Test ids that are not integers are rejected before any database call"""
+    db, cursor = mock_db
+    for payload in (
+        {"user_id": 1, "product_id": 1.9},
+        {"user_id": 1, "product_id": "abc"},
+        {"user_id": "1", "product_id": 1},
+        {"user_id": True, "product_id": 1},
+    ):
+        response = client.post("/orders", json=payload)
+        assert response.status_code == 400
+        assert response.get_json()["error"].endswith("must be an integer")
+    cursor.execute.assert_not_called()
+
+
 def test_create_order_user_not_found(client, mock_db):
     """Test creating an order with non-existent user"""
     db, cursor = mock_db
-    cursor.fetchone.return_value = None
+    cursor.execute.return_value = iter([cursor])
+    cursor.with_rows = True
+    cursor.fetchall.return_value = [{"error": "user_not_found", "id": None, "total_price": None}]
 
     response = client.post(
         "/orders",
@@ -137,10 +162,9 @@ def test_create_order_user_not_found(client, mock_db):
 def test_create_order_product_not_found(client, mock_db):
     """Test creating an order with non-existent product"""
     db, cursor = mock_db
-    cursor.fetchone.side_effect = [
-        {"id": 1},  # User exists
-        None,  # Product doesn't exist
-    ]
+    cursor.execute.return_value = iter([cursor])
+    cursor.with_rows = True
+    cursor.fetchall.return_value = [{"error": "product_not_found", "id": None, "total_price": None}]
 
     response = client.post(
         "/orders",
@@ -149,6 +173,7 @@ def test_create_order_product_not_found(client, mock_db):
     assert response.status_code == 404
     data = response.get_json()
     assert "Product not found" in data["error"]
+    db.commit.assert_not_called()
 
 
 def test_get_order_success(client, mock_db):
@@ -247,7 +272,393 @@ def test_update_order_status_invalid_status(client):
 def test_update_order_status_not_found(client, mock_db):
     """Test updating status for non-existent order"""
     db, cursor = mock_db
-    cursor.rowcount = 0
+    cursor.fetchone.return_value = None
 
     response = client.put("/orders/999/status", json={"status": "shipped"})
     assert response.status_code == 404
+    db.commit.assert_not_called()
+
+
+def test_update_order_status_to_same_status(client, mock_db):
+    """Test setting the current status again succeeds without touching the aggregates"""
+    db, cursor = mock_db
+    cursor.fetchone.return_value = {"status": "shipped", "product_id": 4, "quantity": 1,
+                                    "total_price": Decimal("9.99"), "created_at": datetime(2024, 1, 5)}
+    cursor.rowcount = 0
+
+    response = client.put("/orders/1/status", json={"status": "shipped"})
+    assert response.status_code == 200
+    statements = [c.args[0] for c in cursor.execute.call_args_list]
+    assert not any("order_stats" in sql for sql in statements)
+    db.commit.assert_called_once()
+
+
+def test_list_orders_streams_ndjson(client, mock_db):
+    """Test streaming orders as NDJSON"""
+    db, cursor = mock_db
+    cursor.fetchmany.side_effect = [[{"id": 2}, {"id": 1}], []]
+
+    response = client.get("/orders", headers={"Accept": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert response.get_data(as_text=True) == '{"id": 2}\n{"id": 1}\n'
+    cursor.fetchall.assert_not_called()
+    db.close.assert_called_once()
+
+
+def test_list_orders_paginates_with_cursor(client, mock_db):
+    """Test keyset pagination on GET /orders"""
+    db, cursor = mock_db
+    cursor.fetchall.return_value = [
+        {"id": 3, "created_at": datetime(2024, 1, 3)},
+        {"id": 2, "created_at": datetime(2024, 1, 2)},
+        {"id": 1, "created_at": datetime(2024, 1, 1)},
+    ]
+
+    response = client.get("/orders?limit=2&status=shipped")
+    assert response.status_code == 200
+    assert [o["id"] for o in response.get_json()] == [3, 2]
+    assert decode_cursor(response.headers["X-Next-Cursor"]) == (datetime(2024, 1, 2), 2)
+    assert "status=shipped" in response.headers["Link"]
+    query, params = cursor.execute.call_args.args
+    assert "o.status = %s" in query
+    assert query.rstrip().endswith("ORDER BY o.created_at DESC, o.id DESC\n LIMIT %s")
+    assert params == ["shipped", 3]
+
+
+def test_list_orders_before_cursor_and_date_range(client, mock_db):
+    """Test the before cursor and date filters become index range conditions"""
+    db, cursor = mock_db
+    cursor.fetchall.return_value = []
+    before = encode_cursor(datetime(2024, 1, 2, 10, 30), 7)
+
+    response = client.get(f"/orders?before={before}&from=2024-01-01&to=2024-02-01")
+    assert response.status_code == 200
+    assert "X-Next-Cursor" not in response.headers
+    query, params = cursor.execute.call_args.args
+    assert "(o.created_at < %s OR (o.created_at = %s AND o.id < %s))" in query
+    assert params == [
+        datetime(2024, 1, 1),
+        datetime(2024, 2, 1),
+        datetime(2024, 1, 2, 10, 30),
+        datetime(2024, 1, 2, 10, 30),
+        7,
+        101,
+    ]
+
+
+def test_list_orders_rejects_bad_filters(client):
+    """Test invalid pagination and filter parameters"""
+    assert client.get("/orders?status=lost").status_code == 400
+    assert client.get("/orders?before=garbage").status_code == 400
+    assert client.get("/orders?from=yesterday").status_code == 400
+    assert client.get("/orders?limit=0").status_code == 400
+
+
+def test_get_orders_for_user_paginates(client, mock_db):
+    """Test user order history is filtered by user and paged"""
+    db, cursor = mock_db
+    cursor.fetchall.return_value = [
+        {"id": 5, "created_at": datetime(2024, 3, 2)},
+        {"id": 4, "created_at": datetime(2024, 3, 1)},
+    ]
+
+    response = client.get("/orders/user/1?limit=1&status=delivered")
+    assert response.status_code == 200
+    assert [o["id"] for o in response.get_json()] == [5]
+    assert response.headers["Link"].startswith("</orders/user/1?")
+    query, params = cursor.execute.call_args.args
+    assert "WHERE o.user_id = %s AND o.status = %s" in query
+    assert params == [1, "delivered", 2]
+
+
+def test_get_orders_for_user_summary(client, mock_db):
+    """Test summary mode returns DB-computed count and total spend"""
+    db, cursor = mock_db
+    cursor.fetchone.return_value = {"order_count": 3, "total_spent": Decimal("45.50")}
+
+    response = client.get("/orders/user/1?summary=1")
+    assert response.status_code == 200
+    assert response.get_json() == {"user_id": 1, "order_count": 3, "total_spent": 45.5}
+    query, params = cursor.execute.call_args.args
+    assert query.startswith("SELECT COUNT(*) AS order_count, COALESCE(SUM(o.total_price), 0)")
+    assert params == [1]
+
+
+def test_update_order_status_cancel_updates_stats(client, mock_db):
+    """Test cancelling an order removes it from the sales aggregates"""
+    db, cursor = mock_db
+    cursor.fetchone.return_value = {
+        "status": "created",
+        "product_id": 4,
+        "quantity": 2,
+        "total_price": Decimal("19.98"),
+        "created_at": datetime(2024, 1, 5, 9, 0),
+    }
+    cursor.rowcount = 1
+
+    response = client.put("/orders/1/status", json={"status": "cancelled"})
+    assert response.status_code == 200
+    statements = [c.args for c in cursor.execute.call_args_list]
+    assert statements[-2][0].startswith("INSERT INTO order_stats_daily")
+    assert statements[-2][1] == (datetime(2024, 1, 5).date(), -1, -2, Decimal("-19.98"))
+    assert statements[-1][1] == (4, -1, -2, Decimal("-19.98"))
+    db.commit.assert_called_once()
+
+
+def test_update_order_status_without_stats_change(client, mock_db):
+    """Test moving between counted statuses leaves the aggregates alone"""
+    db, cursor = mock_db
+    cursor.fetchone.return_value = {"status": "created", "product_id": 4, "quantity": 1,
+                                    "total_price": Decimal("9.99"), "created_at": datetime(2024, 1, 5)}
+    cursor.rowcount = 1
+
+    client.put("/orders/1/status", json={"status": "shipped"})
+    assert not any("order_stats" in c.args[0] for c in cursor.execute.call_args_list)
+
+
+def test_daily_stats(client, mock_db):
+    """Test daily stats are read from the summary table"""
+    db, cursor = mock_db
+    cursor.fetchall.return_value = [
+        {"day": datetime(2024, 1, 5).date(), "order_count": 3, "quantity": 4, "revenue": Decimal("30.00")}
+    ]
+
+    response = client.get("/orders/stats/daily?from=2024-01-01")
+    assert response.status_code == 200
+    assert response.get_json() == [{"day": "2024-01-05", "order_count": 3, "quantity": 4, "revenue": 30.0}]
+    query, params = cursor.execute.call_args.args
+    assert "FROM order_stats_daily WHERE day >= %s" in query
+    assert params == [datetime(2024, 1, 1).date()]
+
+
+def test_top_products(client, mock_db):
+    """Test top products by revenue"""
+    db, cursor = mock_db
+    cursor.fetchall.return_value = [
+        {"product_id": 2, "product_name": "Gadget", "order_count": 5, "quantity": 6, "revenue": Decimal("77.94")}
+    ]
+
+    response = client.get("/orders/stats/top-products?n=1")
+    assert response.status_code == 200
+    assert response.get_json()[0]["revenue"] == 77.94
+    assert cursor.execute.call_args.args[1] == (1,)
+    assert client.get("/orders/stats/top-products?n=0").status_code == 400
+
+
+def test_rebuild_stats_command(mock_db):
+    """Test the rebuild CLI recomputes both summary tables"""
+    db, cursor = mock_db
+    with patch("app.db_pool") as pool:
+        pool.acquire.return_value = db
+        result = app.test_cli_runner().invoke(args=["rebuild-stats"])
+    assert result.exit_code == 0
+    statements = [c.args[0] for c in cursor.execute.call_args_list]
+    assert statements[0] == "DELETE FROM order_stats_daily"
+    assert statements[2] == "DELETE FROM order_stats_product"
+    db.commit.assert_called_once()
+    assert result.output == "Order stats rebuilt\n"
+
+
+def test_rebuild_stats_command_fails_with_exit_code(mock_db):
+    """Test a database error during the rebuild exits non-zero"""
+    db, cursor = mock_db
+    cursor.execute.side_effect = mysql.connector.Error("lost connection")
+    with patch("app.db_pool") as pool:
+        pool.acquire.return_value = db
+        result = app.test_cli_runner().invoke(args=["rebuild-stats"])
+    assert result.exit_code == 1
+    assert "Rebuilding order stats failed" in result.output
+    db.rollback.assert_called_once()
+
+
+def test_bulk_status_by_ids(client, mock_db):
+    """Test bulk transition by ids counts missing and unchanged orders as skipped"""
+    db, cursor = mock_db
+    cursor.fetchall.return_value = [
+        {"id": 1, "status": "processing", "product_id": 4, "quantity": 1,
+         "total_price": Decimal("5.00"), "created_at": datetime(2024, 1, 5)},
+        {"id": 2, "status": "shipped", "product_id": 4, "quantity": 1,
+         "total_price": Decimal("5.00"), "created_at": datetime(2024, 1, 5)},
+    ]
+
+    response = client.put(
+        "/orders/status", json={"status": "shipped", "ids": [1, 2, 3], "expected_status": "processing"}
+    )
+    assert response.status_code == 200
+    assert response.get_json()["updated"] == 1
+    assert response.get_json()["skipped"] == 2
+    select, update = cursor.execute.call_args_list[:2]
+    assert select.args[0].endswith("WHERE id IN (%s, %s, %s) AND status = %s FOR UPDATE")
+    assert select.args[1] == [1, 2, 3, "processing"]
+    assert update.args[1] == ["shipped", 1]
+    assert not any("order_stats" in c.args[0] for c in cursor.execute.call_args_list)
+    db.commit.assert_called_once()
+
+
+def test_bulk_status_by_filter_walks_chunks(client, mock_db, monkeypatch):
+    """Test filter mode reads chunks without locks, locks them by id and keeps the aggregates in step"""
+    db, cursor = mock_db
+    monkeypatch.setattr("app.BULK_STATUS_CHUNK_SIZE", 2)
+    created = datetime(2024, 1, 5)
+
+    def order(order_id):
+        return {"id": order_id, "status": "created", "product_id": 4, "quantity": 1,
+                "total_price": Decimal("5.00"), "created_at": created}
+
+    cursor.fetchall.side_effect = [
+        [{"id": 1, "created_at": created}, {"id": 2, "created_at": created}],
+        [order(1), order(2)],
+        [{"id": 7, "created_at": created}],
+        [order(7)],
+    ]
+
+    response = client.put(
+        "/orders/status",
+        json={"status": "cancelled", "filter": {"status": "created", "created_before": "2024-02-01"}},
+    )
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "cancelled", "matched": 3, "updated": 3, "skipped": 0}
+    selects = [c.args for c in cursor.execute.call_args_list if c.args[0].startswith("SELECT")]
+    assert "FOR UPDATE" not in selects[0][0]
+    assert selects[0][0].endswith("ORDER BY created_at, id LIMIT %s")
+    assert selects[0][1] == ["created", datetime(2024, 2, 1), 2]
+    # Only the chunk's rows are locked, with the filter re-checked
+    assert selects[1][0].endswith("WHERE id IN (%s, %s) AND status = %s AND created_at < %s FOR UPDATE")
+    assert selects[1][1] == [1, 2, "created", datetime(2024, 2, 1)]
+    assert selects[2][1] == ["created", datetime(2024, 2, 1), created, created, 2, 2]
+    daily = [c.args for c in cursor.execute.call_args_list if "order_stats_daily" in c.args[0]]
+    assert daily[0][1] == [created.date(), -2, -2, Decimal("-10.00")]
+    assert db.commit.call_count == 3
+
+
+def test_bulk_status_rejects_bad_requests(client):
+    """Test bulk transition validation"""
+    assert client.put("/orders/status", json={"status": "bogus", "ids": [1]}).status_code == 400
+    assert client.put("/orders/status", json={"status": "shipped"}).status_code == 400
+    assert client.put("/orders/status", json={"status": "shipped", "ids": ["x"]}).status_code == 400
+    assert client.put("/orders/status", json={"status": "shipped", "filter": {}}).status_code == 400
+    assert client.put("/orders/status", json={"status": "shipped", "filter": {"user": 1}}).status_code == 400
+
+
+def test_export_walks_primary_key_chunks(client, mock_db, monkeypatch):
+    """Test export reads id ranges and resumes after the last id"""
+    db, cursor = mock_db
+    monkeypatch.setattr("app.EXPORT_CHUNK_SIZE", 2)
+    created = datetime(2024, 1, 5, 9, 0)
+    cursor.fetchall.side_effect = [
+        [(11, Decimal("5.00"), created), (12, Decimal("6.00"), created)],
+        [(15, Decimal("7.50"), created)],
+    ]
+
+    response = client.get("/orders/export?fields=total_price,created_at&from=2024-01-01&after_id=10")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[0] == {"id": 11, "total_price": 5.0, "created_at": "2024-01-05T09:00:00"}
+    assert [line["id"] for line in lines] == [11, 12, 15]
+    first, second = cursor.execute.call_args_list
+    assert first.args[0] == (
+        "SELECT id, total_price, created_at FROM orders WHERE created_at >= %s AND id > %s ORDER BY id LIMIT %s"
+    )
+    assert first.args[1] == [datetime(2024, 1, 1), 10, 2]
+    assert second.args[1][1] == 12
+    db.close.assert_called_once()
+
+
+def test_export_include_archived_merges_history(client, mock_db, monkeypatch):
+    """Test include_archived exports orders and orders_history together in id order"""
+    db, cursor = mock_db
+    monkeypatch.setattr("app.EXPORT_CHUNK_SIZE", 5)
+    cursor.fetchall.side_effect = [[(3, "delivered"), (4, "created")]]
+
+    response = client.get("/orders/export?fields=id,status&include_archived=1")
+    assert [json.loads(line)["id"] for line in response.get_data(as_text=True).splitlines()] == [3, 4]
+    query, params = cursor.execute.call_args.args
+    assert "FROM orders WHERE" in query and "FROM orders_history WHERE" in query
+    assert query.endswith(") ORDER BY id LIMIT %s")
+    assert params == [0, 5, 0, 5, 5]
+
+
+def test_export_csv_gzip(client, mock_db):
+    """Test CSV export is gzip-compressed when the client accepts it"""
+    db, cursor = mock_db
+    cursor.fetchall.side_effect = [[(1, "shipped")]]
+
+    response = client.get("/orders/export?format=csv&fields=id,status", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.get_data()).decode().splitlines() == ["id,status", "1,shipped"]
+
+
+def test_export_rejects_bad_params(client):
+    """Test export validation"""
+    assert client.get("/orders/export?format=xml").status_code == 400
+    assert client.get("/orders/export?fields=id,password").status_code == 400
+    assert client.get("/orders/export?after_id=abc").status_code == 400
+
+
+def test_get_order_falls_back_to_archive(client, mock_db):
+    """Test an id missing from orders is looked up in orders_history"""
+    db, cursor = mock_db
+    cursor.fetchone.side_effect = [None, {"id": 3, "status": "delivered"}]
+
+    response = client.get("/orders/3")
+    assert response.status_code == 200
+    assert response.get_json() == {"id": 3, "status": "delivered", "archived": True}
+    assert "FROM orders_history o" in cursor.execute.call_args.args[0]
+
+
+def test_list_orders_include_archived(client, mock_db):
+    """Test include_archived merges both tables, each side limited"""
+    db, cursor = mock_db
+    cursor.fetchall.return_value = []
+
+    response = client.get("/orders?include_archived=1&status=delivered&limit=10")
+    assert response.status_code == 200
+    query, params = cursor.execute.call_args.args
+    assert "FROM orders o" in query and "FROM orders_history o" in query
+    assert query.endswith(") ORDER BY created_at DESC, id DESC LIMIT %s")
+    assert params == ["delivered", 11, "delivered", 11, 11]
+
+
+def test_archive_orders_moves_chunks(mock_db):
+    """Test archiving finds chunks without locks, then locks, copies and deletes each by id"""
+    from app import archive_orders
+
+    db, cursor = mock_db
+    old = datetime(2024, 1, 5)
+    cursor.fetchall.side_effect = [
+        [(1, old), (2, old)], [(1,), (2,)],  # delivered, first chunk
+        [(5, old)], [(5,)],  # delivered, last chunk
+        [(8, old)], [],  # cancelled: order 8 changed status before it could be locked
+    ]
+
+    assert archive_orders(db, older_than_days=30, chunk_size=2) == 3
+    statements = [c.args for c in cursor.execute.call_args_list]
+    assert "FOR UPDATE" not in statements[0][0]
+    assert statements[0][1] == ["delivered", 30, 2]
+    assert statements[1][0].endswith("FOR UPDATE")
+    assert statements[1][1] == [1, 2, "delivered", 30]
+    assert statements[2][0].startswith("INSERT INTO orders_history")
+    assert statements[3] == ("DELETE FROM orders WHERE id IN (%s, %s)", [1, 2])
+    assert statements[4][1] == ["delivered", 30, old, old, 2, 2]
+    assert statements[8][1] == ["cancelled", 30, 2]
+    assert not any(c[0].startswith("DELETE") and 8 in c[1] for c in statements)
+    assert db.commit.call_count == 3
+
+
+def test_archive_orders_command_reports_failure(mock_db):
+    """Test the archive CLI echoes its count and exits non-zero on a database error"""
+    db, cursor = mock_db
+    cursor.fetchall.return_value = []
+    with patch("app.db_pool") as pool:
+        pool.acquire.return_value = db
+        result = app.test_cli_runner().invoke(args=["archive-orders"])
+        assert result.exit_code == 0
+        assert result.output == "Archived 0 orders\n"
+
+        cursor.execute.side_effect = mysql.connector.Error("lock wait timeout")
+        result = app.test_cli_runner().invoke(args=["archive-orders"])
+    assert result.exit_code == 1
+    assert "Archiving orders failed" in result.output
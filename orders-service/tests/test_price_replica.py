@@ -0,0 +1,154 @@
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import mysql.connector
+import pytest
+
+import app as orders_app
+from price_replica import PriceReplica
+
+
+def foreign_key_error(table, column):
+    return mysql.connector.IntegrityError(
+        msg="Cannot add or update a child row: a foreign key constraint fails (`capstone`.`orders`, "
+        f"CONSTRAINT `orders_ibfk` FOREIGN KEY (`{column}`) REFERENCES `{table}` (`id`) ON DELETE CASCADE)",
+        errno=1452,
+    )
+
+
+def make_db():
+    db = MagicMock()
+    cur = MagicMock()
+    db.cursor.return_value = cur
+    return db, cur
+
+
+@pytest.fixture
+def replica_client():
+    with patch("app.get_db") as get_db:
+        db, cursor = make_db()
+        get_db.return_value = db
+        yield orders_app.app.test_client(), cursor
+
+
+def loaded_replica():
+    replica = PriceReplica()
+    db, cur = make_db()
+    cur.fetchone.return_value = (5, 0)
+    cur.fetchall.return_value = [(1, "Widget", Decimal("2.50")), (2, "Gadget", Decimal("9.99"))]
+    replica.load(db)
+    return replica
+
+
+def test_load_reads_a_consistent_snapshot():
+    """The version and products are read in one read-only snapshot"""
+    db, cur = make_db()
+    cur.fetchone.return_value = (5, 0)
+    cur.fetchall.return_value = [(1, "Widget", Decimal("2.50"))]
+    replica = PriceReplica()
+    replica.load(db)
+    db.start_transaction.assert_called_once_with(consistent_snapshot=True, readonly=True)
+    db.rollback.assert_called_once()
+    assert replica.lookup(1) == ("Widget", Decimal("2.50"))
+    assert replica.stats()["version"] == 5
+
+
+def test_refresh_applies_changes_since_version():
+    """Changes between the known and current catalog version are applied in order"""
+    replica = loaded_replica()
+    db, cur = make_db()
+    cur.fetchone.return_value = (7, 0)
+    cur.fetchall.return_value = [
+        (1, "Widget", Decimal("3.00"), 0),
+        (2, None, None, 1),
+        (3, "New", Decimal("1.00"), 0),
+    ]
+    replica.refresh(db)
+    assert cur.execute.call_args.args[1] == (5, 7)
+    assert replica.lookup(1) == ("Widget", Decimal("3.00"))
+    assert replica.lookup(2) is None
+    assert replica.lookup(3) == ("New", Decimal("1.00"))
+    assert replica.stats()["changes_applied"] == 3
+
+
+def test_refresh_reloads_when_feed_was_pruned_past_it():
+    """Changes pruned before the replica applied them force a full reload"""
+    replica = loaded_replica()
+    db, cur = make_db()
+    cur.fetchone.return_value = (9, 6)
+    cur.fetchall.return_value = [(1, "Widget", Decimal("4.00"))]
+    replica.refresh(db)
+    statements = [c.args[0] for c in cur.execute.call_args_list]
+    assert not any("product_changes" in statement for statement in statements)
+    assert "SELECT id, name, price FROM products" in statements
+    assert replica.lookup(2) is None
+    assert replica.stats()["version"] == 9
+
+
+def test_report_records_applied_version():
+    """The applied version is written when it moves, not on every refresh"""
+    replica = loaded_replica()
+    replica.consumer = "orders@test:1"
+    db, cur = make_db()
+    replica.report(db)
+    replica.report(db)
+    cur.execute.assert_called_once()
+    assert cur.execute.call_args.args[1] == ("orders@test:1", 5)
+    db.commit.assert_called_once()
+    assert replica.stats()["reports"] == 1
+
+
+def test_stale_replica_answers_nothing():
+    """Lookups fall back to the database once the last refresh is too old"""
+    replica = loaded_replica()
+    replica.max_staleness = 0
+    assert replica.lookup(1) is None
+    assert replica.stats()["stale"] == 1
+
+
+def test_create_order_prices_from_replica(replica_client):
+    """A replica hit creates the order with create_priced_order"""
+    client, cursor = replica_client
+    cursor.execute.return_value = iter([cursor])
+    cursor.with_rows = True
+    cursor.fetchall.return_value = [{"error": None, "id": 9, "total_price": Decimal("5.00")}]
+    with patch.object(orders_app, "price_replica", loaded_replica()):
+        response = client.post("/orders", json={"user_id": 1, "product_id": 1, "quantity": 2})
+    assert response.status_code == 201
+    statement, params = cursor.execute.call_args.args
+    assert statement == "CALL create_priced_order(%s, %s, %s, %s)"
+    assert params == (1, 1, 2, Decimal("2.50"))
+
+
+def test_create_order_with_deleted_product_in_replica(replica_client):
+    """A product deleted behind the replica's back is a 404 and is dropped from it"""
+    client, cursor = replica_client
+    cursor.execute.side_effect = foreign_key_error("products", "product_id")
+    replica = loaded_replica()
+    with patch.object(orders_app, "price_replica", replica):
+        response = client.post("/orders", json={"user_id": 1, "product_id": 2})
+    assert response.status_code == 404
+    assert replica.lookup(2) is None
+
+
+def test_create_order_with_deleted_user_keeps_product(replica_client):
+    """A user foreign key failure is user_not_found and leaves the replica alone"""
+    client, cursor = replica_client
+    cursor.execute.side_effect = foreign_key_error("users", "user_id")
+    replica = loaded_replica()
+    with patch.object(orders_app, "price_replica", replica):
+        response = client.post("/orders", json={"user_id": 3, "product_id": 2})
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "User not found"}
+    assert replica.lookup(2) == ("Gadget", Decimal("9.99"))
+
+
+def test_create_order_other_integrity_error_is_500(replica_client):
+    """Integrity failures that are not a missing user or product are not reported as 404"""
+    client, cursor = replica_client
+    cursor.execute.side_effect = mysql.connector.IntegrityError(msg="Column 'quantity' cannot be null", errno=1048)
+    replica = loaded_replica()
+    with patch.object(orders_app, "price_replica", replica):
+        response = client.post("/orders", json={"user_id": 1, "product_id": 2})
+    assert response.status_code == 500
+    assert replica.lookup(2) == ("Gadget", Decimal("9.99"))
@@ -1,13 +1,24 @@
 from flask import Flask, jsonify, request
+from werkzeug.http import http_date
+import csv
+import io
+import json
 import os
+import click
 import mysql.connector
 from mysql.connector import Error
 
+from cache import cache_from_env
+from db_pool import checkout, init_app, pool_from_env, start_pool
+from migrations import run_migrations
+from search_index import InvertedIndex
+from streaming import stream_cursor, wants_ndjson, wants_stream
+
 app = Flask(__name__)
 
 
-def get_db():
-    """Create database connection."""
+def _connect():
+    """Open a new database connection."""
     return mysql.connector.connect(
         host=os.environ.get("DB_HOST", "mysql"),
         user=os.environ.get("DB_USER", "root"),
@@ -16,15 +27,107 @@ def get_db():
     )
 
 
+db_pool = pool_from_env(_connect)
+init_app(app)
+
+
+def get_db():
+    """Check out a pooled connection bound to the current app context."""
+    return checkout(db_pool)
+
+
+product_cache = cache_from_env()
+ALL_PRODUCTS_KEY = "all"
+VERSION_KEY = "version"
+MAX_BATCH_IDS = 500
+IMPORT_CHUNK_SIZE = int(os.environ.get("PRODUCTS_IMPORT_CHUNK_SIZE", "1000"))
+MAX_IMPORT_ERRORS = 1000
+BULK_UPDATE_CHUNK_SIZE = 1000
+UPDATABLE_FIELDS = ("name", "price", "description")
+
+
+def product_key(product_id):
+    return ("product", int(product_id))
+
+
+def invalidate_product(product_id=None):
+    """Drop cached reads affected by a write to product_id (or by an insert)."""
+    keys = [VERSION_KEY]
+    if product_id is not None:
+        keys.append(product_key(product_id))
+    product_cache.invalidate(*keys)
+
+
+SEARCH_BACKEND = os.environ.get("PRODUCTS_SEARCH_BACKEND", "fulltext")
+MAX_SEARCH_RESULTS = 100
+search_index = InvertedIndex()
+
+
+def reindex_product(version, product_id, fields=None):
+    """
+    Apply a write committed at catalog version to the in-memory search index.
+
+    Skipped when the index is not loaded; if another process wrote in
+    between (the index is not at version - 1) the index is reset instead so
+    the next search reloads it.
+    """
+    if not search_index.advance(version):
+        return
+    if fields is None:
+        search_index.remove(product_id)
+    else:
+        search_index.upsert(product_id, fields)
+
+
+def bump_catalog_version(cur):
+    """
+    Advance the catalog version inside the caller's write transaction.
+
+    Call it before writing to products: the row lock it takes orders catalog
+    writes by version, and the product_changes triggers stamp each change
+    with the version this transaction has just claimed. Returns that version
+    (set through LAST_INSERT_ID so reading it costs no extra round trip).
+    """
+    cur.execute("UPDATE catalog_version SET version = LAST_INSERT_ID(version + 1) WHERE id = 1")
+    return cur.lastrowid
+
+
+def catalog_state():
+    """Return (version, updated_at) of the catalog, served from the cache when warm."""
+    return product_cache.get_or_load(VERSION_KEY, _query_catalog_state)
+
+
+def _query_catalog_state():
+    db = get_db()
+    cur = db.cursor()
+    try:
+        cur.execute("SELECT version, updated_at FROM catalog_version WHERE id = 1")
+        row = cur.fetchone()
+        return (row[0], row[1]) if row else (0, None)
+    finally:
+        cur.close()
+        db.close()
+
+
 def fetch_products():
-    """Return all products as a list of dicts."""
+    """
+    Return all products as a list of dicts, served from the cache when warm.
+
+    The list is cached per catalog version, so it is never older than the
+    version used for the ETag.
+    """
+    version, _ = catalog_state()
+    return product_cache.get_or_load((ALL_PRODUCTS_KEY, version), _query_products)
+
+
+PRODUCTS_QUERY = "SELECT id, name, price, description, created_at FROM products ORDER BY id"
+
+
+def _query_products():
     db = get_db()
     cur = db.cursor(dictionary=True)
     try:
-        cur.execute(
-            "SELECT id, name, price, description, created_at "
-            "FROM products ORDER BY id"
-        )
+        cur.execute(PRODUCTS_QUERY)
         rows = cur.fetchall()
         return rows
     finally:
@@ -33,7 +136,11 @@ def fetch_products():
 
 
 def fetch_product(product_id: int):
-    """Return a single product dict or None if not found."""
+    """Return a single product dict or None if not found, served from the cache when warm."""
+    return product_cache.get_or_load(product_key(product_id), lambda: _query_product(product_id))
+
+
+def _query_product(product_id):
     db = get_db()
     cur = db.cursor(dictionary=True)
     try:
@@ -49,6 +156,54 @@ def fetch_product(product_id: int):
         db.close()
 
 
+def fetch_products_by_ids(product_ids):
+    """
+    Return {id: product dict or None} for product_ids.
+
+    Shares cache entries with fetch_product(); ids that miss the cache are
+    resolved together with a single WHERE id IN (...) query.
+    """
+    keys = [product_key(product_id) for product_id in product_ids]
+    found = product_cache.get_or_load_many(keys, _query_products_by_keys)
+    return {key[1]: found[key] for key in keys}
+
+
+def _query_products_by_keys(keys):
+    ids = [key[1] for key in keys]
+    db = get_db()
+    cur = db.cursor(dictionary=True)
+    try:
+        placeholders = ", ".join(["%s"] * len(ids))
+        cur.execute(
+            "SELECT id, name, price, description, created_at "
+            f"FROM products WHERE id IN ({placeholders})",
+            ids,
+        )
+        rows = {row["id"]: row for row in cur.fetchall()}
+        return {product_key(product_id): rows.get(product_id) for product_id in ids}
+    finally:
+        cur.close()
+        db.close()
+
+
+def parse_id_list(value):
+    """Parse ?ids=1,2,3 into a de-duplicated list of ints, keeping request order."""
+    ids = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            raise ValueError(f"invalid id: {part}")
+        if int(part) not in ids:
+            ids.append(int(part))
+    if not ids:
+        raise ValueError("ids must not be empty")
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValueError(f"at most {MAX_BATCH_IDS} ids per request")
+    return ids
+
+
 def create_product(data: dict):
     """
     Create a product in the DB and return its data.
@@ -65,12 +220,15 @@ def create_product(data: dict):
     db = get_db()
     cur = db.cursor()
     try:
+        version = bump_catalog_version(cur)
         cur.execute(
             "INSERT INTO products (name, price, description) VALUES (%s, %s, %s)",
             (name, price, description),
         )
-        db.commit()
         product_id = cur.lastrowid
+        db.commit()
+        invalidate_product(product_id)
+        reindex_product(version, product_id, {"name": name, "price": price, "description": description})
         return {
             "id": product_id,
             "name": name,
@@ -88,12 +246,141 @@ def health():
     return jsonify({"status": "healthy"}), 200
 
 
+@app.route("/health/db-pool", methods=["GET"])
+def db_pool_stats():
+    """Connection pool gauges and counters"""
+    return jsonify(db_pool.stats()), 200
+
+
+@app.route("/health/cache", methods=["GET"])
+def cache_stats():
+    """Product cache hit/miss/eviction counters."""
+    return jsonify(product_cache.stats()), 200
+
+
+def not_modified(etag, last_modified):
+    """True if the request's validators match the current catalog."""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
 @app.route("/products", methods=["GET"])
 def list_products():
-    """List all products from database."""
+    """
+    List all products from database.
+
+    Responses carry a strong ETag derived from the catalog version and the
+    representation (JSON, streamed JSON array or NDJSON, which differ in
+    bytes) plus Vary: Accept and a Last-Modified header; a matching
+    If-None-Match (or If-Modified-Since) gets 304 without reading or encoding
+    the catalog.
+
+    With Accept: application/x-ndjson or ?stream=1 the rows are streamed from
+    an unbuffered cursor instead of being loaded through the cache.
+
+    ?ids=3,1,2 returns {"products": [...], "missing": [...]} with the found
+    products in the requested order.
+    """
+    if "ids" in request.args:
+        try:
+            ids = parse_id_list(request.args["ids"])
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        try:
+            by_id = fetch_products_by_ids(ids)
+        except Error as exc:
+            return jsonify({"error": str(exc)}), 500
+        return jsonify(
+            {
+                "products": [by_id[product_id] for product_id in ids if by_id[product_id]],
+                "missing": [product_id for product_id in ids if not by_id[product_id]],
+            }
+        ), 200
+
     try:
+        version, updated_at = catalog_state()
+        stream = wants_stream()
+        etag = f"catalog-{version}"
+        if stream:
+            etag += "-ndjson" if wants_ndjson() else "-stream"
+        headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache", "Vary": "Accept"}
+        if updated_at is not None:
+            headers["Last-Modified"] = http_date(updated_at)
+        if not_modified(etag, updated_at):
+            return "", 304, headers
+        if stream:
+            db = get_db()
+            cur = db.cursor(dictionary=True)
+            cur.execute(PRODUCTS_QUERY)
+            return stream_cursor(db, cur, headers)
         products = fetch_products()
-        return jsonify(products), 200
+        return jsonify(products), 200, headers
+    except Error as exc:
+        return jsonify({"error": str(exc)}), 500
+
+
+def search_products(query, min_price=None, max_price=None, limit=20):
+    """
+    Return up to limit products matching query, best match first, each with a score.
+
+    Uses the FULLTEXT index on (name, description) unless
+    PRODUCTS_SEARCH_BACKEND=memory, in which case the in-process inverted
+    index answers without a DB round trip. The index is reloaded whenever
+    the catalog version is ahead of it, so writes made by other workers show
+    up within PRODUCTS_CACHE_TTL (how long catalog_state() is cached).
+    """
+    if SEARCH_BACKEND == "memory":
+        version, _ = catalog_state()
+        search_index.ensure_loaded(_query_products, version)
+        matches = search_index.search(query, min_price, max_price, limit)
+        return [dict(product, score=score) for score, product in matches]
+
+    conditions = ["MATCH(name, description) AGAINST (%s IN NATURAL LANGUAGE MODE)"]
+    params = [query, query]
+    if min_price is not None:
+        conditions.append("price >= %s")
+        params.append(min_price)
+    if max_price is not None:
+        conditions.append("price <= %s")
+        params.append(max_price)
+    params.append(limit)
+
+    db = get_db()
+    cur = db.cursor(dictionary=True)
+    try:
+        cur.execute(
+            "SELECT id, name, price, description, created_at, "
+            "MATCH(name, description) AGAINST (%s IN NATURAL LANGUAGE MODE) AS score "
+            "FROM products WHERE " + " AND ".join(conditions) + " ORDER BY score DESC, id LIMIT %s",
+            params,
+        )
+        return cur.fetchall()
+    finally:
+        cur.close()
+        db.close()
+
+
+@app.route("/products/search", methods=["GET"])
+def search():
+    """Ranked search over product name and description with an optional price range."""
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+
+    try:
+        min_price = float(request.args["min_price"]) if request.args.get("min_price") else None
+        max_price = float(request.args["max_price"]) if request.args.get("max_price") else None
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        return jsonify({"error": "min_price, max_price and limit must be numbers"}), 400
+    if limit < 1 or limit > MAX_SEARCH_RESULTS:
+        return jsonify({"error": f"limit must be between 1 and {MAX_SEARCH_RESULTS}"}), 400
+
+    try:
+        return jsonify(search_products(query, min_price, max_price, limit)), 200
     except Error as exc:
         return jsonify({"error": str(exc)}), 500
 
@@ -110,18 +397,15 @@ def get_product(product_id):
         return jsonify({"error": str(exc)}), 500
 
 
-@app.route("/products", methods=["POST"])
-def add_product():
+def validate_product(payload):
     """
-    Add a new product to database.
+    Apply the POST /products rules to payload.
 
-    Tests monkeypatch app.create_product, so this route MUST call create_product().
-    Name is required; price/description are optional.
+    Returns (product, None) with name, price and description filled in, or
+    (None, error message).
     """
-    payload = request.get_json() or {}
-
     if "name" not in payload:
-        return jsonify({"error": "Invalid payload. Required: name"}), 400
+        return None, "Invalid payload. Required: name"
 
     # Optional fields with defaults
     price = payload.get("price", 0.0)
@@ -132,23 +416,177 @@ def add_product():
         try:
             price = float(price)
             if price < 0:
-                return jsonify({"error": "Price must be positive"}), 400
+                return None, "Price must be positive"
         except (ValueError, TypeError):
-            return jsonify({"error": "Price must be a valid number"}), 400
+            return None, "Price must be a valid number"
+
+    return {"name": payload["name"], "price": price, "description": description}, None
+
+
+@app.route("/products", methods=["POST"])
+def add_product():
+    """
+    Add a new product to database.
+
+    Tests monkeypatch app.create_product, so this route MUST call create_product().
+    Name is required; price/description are optional.
+    """
+    payload = request.get_json() or {}
+
+    product, error = validate_product(payload)
+    if error:
+        return jsonify({"error": error}), 400
 
     try:
-        product = create_product(
-            {
-                "name": payload["name"],
-                "price": price,
-                "description": description,
-            }
-        )
+        product = create_product(product)
         return jsonify(product), 201
     except Error as exc:
         return jsonify({"error": str(exc)}), 500
 
 
+def iter_import_rows(stream, mimetype):
+    """
+    Yield (line number, row dict or None) from a CSV or NDJSON body stream.
+
+    The body is decoded incrementally and never held in memory as a whole.
+    Rows that cannot be decoded are yielded as None. A CSV body the csv
+    module cannot parse raises csv.Error with a line attribute.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if mimetype == "text/csv":
+        reader = csv.DictReader(text)
+        line_number = 0
+        try:
+            if reader.fieldnames is not None:
+                line_number = reader.line_num
+            for row in reader:
+                line_number = reader.line_num
+                # Empty CSV cells mean "not provided" so the POST defaults apply
+                yield line_number, {key: value for key, value in row.items() if key and value not in ("", None)}
+        except csv.Error as exc:
+            # The bad record starts on the line after the last one parsed
+            exc.line = line_number + 1
+            raise
+        return
+    for line_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def upsert_product_chunk(cur, chunk):
+    """
+    Write [(id or None, name, price, description)] with multi-row upserts.
+
+    A price of None means the row did not provide one: a new product gets
+    the POST default of 0.0 and an existing product keeps its price, so those
+    rows go in a second statement that does not update price.
+    """
+    bump_catalog_version(cur)
+    priced = [row for row in chunk if row[2] is not None]
+    unpriced = [(product_id, name, 0.0, description) for product_id, name, price, description in chunk if price is None]
+    for rows, assignments in (
+        (priced, "name = new.name, price = new.price, description = new.description"),
+        (unpriced, "name = new.name, description = new.description"),
+    ):
+        if not rows:
+            continue
+        values = ", ".join(["(%s, %s, %s, %s)"] * len(rows))
+        cur.execute(
+            "INSERT INTO products (id, name, price, description) VALUES " + values + " AS new "
+            "ON DUPLICATE KEY UPDATE " + assignments,
+            [value for row in rows for value in row],
+        )
+
+
+@app.route("/products/import", methods=["POST"])
+def import_products():
+    """
+    Stream a CSV (text/csv) or NDJSON (application/x-ndjson) catalog into products.
+
+    Rows follow the POST /products rules; a row with an id replaces that
+    product (keeping its price if the row has none), a row without one is
+    inserted. Rows are written with multi-row
+    INSERT ... ON DUPLICATE KEY UPDATE, committing every chunk_size rows
+    (?chunk_size=, default PRODUCTS_IMPORT_CHUNK_SIZE). Returns a summary with
+    the line number and reason for each rejected row.
+    """
+    if request.mimetype not in ("text/csv", "application/x-ndjson"):
+        return jsonify({"error": "Content-Type must be text/csv or application/x-ndjson"}), 415
+    try:
+        chunk_size = int(request.args.get("chunk_size", IMPORT_CHUNK_SIZE))
+        if chunk_size < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "chunk_size must be a positive integer"}), 400
+
+    summary = {"rows": 0, "written": 0, "failed": 0, "errors": [], "errors_truncated": False}
+
+    def reject(line_number, error):
+        summary["failed"] += 1
+        if len(summary["errors"]) < MAX_IMPORT_ERRORS:
+            summary["errors"].append({"line": line_number, "error": error})
+        else:
+            summary["errors_truncated"] = True
+
+    chunk = []
+    db = None
+    try:
+        db = get_db()
+        cur = db.cursor()
+        for line_number, row in iter_import_rows(request.stream, request.mimetype):
+            summary["rows"] += 1
+            if row is None:
+                reject(line_number, "Row is not a valid object")
+                continue
+            product_id = row.get("id")
+            if product_id is not None:
+                try:
+                    product_id = int(product_id)
+                except (ValueError, TypeError):
+                    reject(line_number, "id must be an integer")
+                    continue
+                if product_id <= 0:
+                    reject(line_number, "id must be a positive integer")
+                    continue
+            product, error = validate_product(row)
+            if error:
+                reject(line_number, error)
+                continue
+            price = product["price"] if "price" in row or product_id is None else None
+            chunk.append((product_id, product["name"], price, product["description"]))
+            if len(chunk) >= chunk_size:
+                upsert_product_chunk(cur, chunk)
+                db.commit()
+                summary["written"] += len(chunk)
+                chunk = []
+        if chunk:
+            upsert_product_chunk(cur, chunk)
+            db.commit()
+            summary["written"] += len(chunk)
+        cur.close()
+        db.close()
+    except UnicodeDecodeError:
+        return jsonify(dict(summary, error="Body must be UTF-8")), 400
+    except csv.Error as exc:
+        return jsonify(dict(summary, error=f"Malformed CSV: {exc}", line=exc.line)), 400
+    except Error as exc:
+        if db is not None:
+            db.rollback()
+        return jsonify(dict(summary, error=str(exc))), 500
+    finally:
+        if summary["written"]:
+            product_cache.clear()
+            search_index.reset()
+
+    return jsonify(summary), 200
+
+
 @app.route("/products/<int:product_id>", methods=["PUT"])
 def update_product(product_id):
     """Update an existing product."""
@@ -158,10 +596,12 @@ def update_product(product_id):
 
     updates = []
     values = []
+    fields = {}
 
     if "name" in payload:
         updates.append("name = %s")
         values.append(payload["name"])
+        fields["name"] = payload["name"]
 
     if "price" in payload:
         try:
@@ -170,10 +610,12 @@ def update_product(product_id):
             return jsonify({"error": "Price must be a valid number"}), 400
         updates.append("price = %s")
         values.append(price)
+        fields["price"] = price
 
     if "description" in payload:
         updates.append("description = %s")
         values.append(payload["description"])
+        fields["description"] = payload["description"]
 
     if not updates:
         return jsonify({"error": "No valid fields to update"}), 400
@@ -184,10 +626,18 @@ def update_product(product_id):
         db = get_db()
         cur = db.cursor()
         query = "UPDATE products SET " + ", ".join(updates) + " WHERE id = %s"
+        version = bump_catalog_version(cur)
         cur.execute(query, values)
-        db.commit()
-
-        if cur.rowcount == 0:
+        updated = cur.rowcount
+        if updated:
+            db.commit()
+        else:
+            db.rollback()
+        invalidate_product(product_id)
+        if updated:
+            reindex_product(version, product_id, fields)
+
+        if updated == 0:
             cur.close()
             db.close()
             return jsonify({"error": "Product not found"}), 404
@@ -199,16 +649,132 @@ def update_product(product_id):
         return jsonify({"error": str(exc)}), 500
 
 
+def validate_product_update(item):
+    """Return (id, {field: value}, None) for a PATCH /products item, or (id, None, error)."""
+    if not isinstance(item, dict):
+        return None, None, "Item must be an object"
+    product_id = item.get("id")
+    if isinstance(product_id, bool) or not isinstance(product_id, int):
+        return product_id, None, "id must be an integer"
+    fields = {field: item[field] for field in UPDATABLE_FIELDS if field in item}
+    if not fields:
+        return product_id, None, "No valid fields to update"
+    if "price" in fields:
+        try:
+            fields["price"] = float(fields["price"])
+        except (ValueError, TypeError):
+            return product_id, None, "Price must be a valid number"
+    return product_id, fields, None
+
+
+def bulk_update_chunk(cur, field_names, updates):
+    """
+    Apply {id: fields} sharing the same field_names with one CASE-based UPDATE.
+
+    Returns the ids that exist; they are locked until the caller commits.
+    """
+    ids = list(updates)
+    placeholders = ", ".join(["%s"] * len(ids))
+    cur.execute(f"SELECT id FROM products WHERE id IN ({placeholders}) FOR UPDATE", ids)
+    existing = [row[0] for row in cur.fetchall()]
+    if not existing:
+        return []
+
+    assignments = []
+    params = []
+    for field in field_names:
+        assignments.append(f"{field} = CASE id " + " ".join(["WHEN %s THEN %s"] * len(existing)) + " END")
+        for product_id in existing:
+            params.extend((product_id, updates[product_id][field]))
+    params.extend(existing)
+    placeholders = ", ".join(["%s"] * len(existing))
+    cur.execute("UPDATE products SET " + ", ".join(assignments) + f" WHERE id IN ({placeholders})", params)
+    return existing
+
+
+@app.route("/products", methods=["PATCH"])
+def bulk_update_products():
+    """
+    Update many products in one transaction.
+
+    Takes a JSON array of {"id", "name"?, "price"?, "description"?}. Items are
+    grouped by the set of fields they change and each group is applied with
+    CASE-based UPDATEs of up to BULK_UPDATE_CHUNK_SIZE rows. Returns a status
+    per item: updated, not_found or invalid.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, list) or not payload:
+        return jsonify({"error": "Expected a non-empty JSON array of product updates"}), 400
+
+    results = []
+    groups = {}
+    seen = set()
+    for item in payload:
+        product_id, fields, error = validate_product_update(item)
+        if not error and product_id in seen:
+            error = "Duplicate id"
+        if error:
+            results.append({"id": product_id, "status": "invalid", "error": error})
+            continue
+        seen.add(product_id)
+        results.append({"id": product_id, "status": "not_found"})
+        field_names = tuple(field for field in UPDATABLE_FIELDS if field in fields)
+        groups.setdefault(field_names, {})[product_id] = fields
+
+    updated = set()
+    db = None
+    try:
+        db = get_db()
+        cur = db.cursor()
+        version = bump_catalog_version(cur)
+        for field_names, updates in groups.items():
+            ids = list(updates)
+            for start in range(0, len(ids), BULK_UPDATE_CHUNK_SIZE):
+                chunk = {product_id: updates[product_id] for product_id in ids[start:start + BULK_UPDATE_CHUNK_SIZE]}
+                updated.update(bulk_update_chunk(cur, field_names, chunk))
+        if updated:
+            db.commit()
+        else:
+            db.rollback()
+        cur.close()
+        db.close()
+    except Error as exc:
+        if db is not None:
+            db.rollback()
+        return jsonify({"error": str(exc)}), 500
+
+    product_cache.invalidate(VERSION_KEY, *[product_key(product_id) for product_id in updated])
+    for field_names, updates in groups.items():
+        for product_id, fields in updates.items():
+            if product_id in updated:
+                reindex_product(version, product_id, fields)
+
+    counts = {"updated": 0, "not_found": 0, "invalid": 0}
+    for result in results:
+        if result["status"] == "not_found" and result["id"] in updated:
+            result["status"] = "updated"
+        counts[result["status"]] += 1
+    return jsonify({**counts, "results": results}), 200
+
+
 @app.route("/products/<int:product_id>", methods=["DELETE"])
 def delete_product(product_id):
     """Delete a product."""
     try:
         db = get_db()
         cur = db.cursor()
+        version = bump_catalog_version(cur)
         cur.execute("DELETE FROM products WHERE id = %s", (product_id,))
-        db.commit()
-
-        if cur.rowcount == 0:
+        deleted = cur.rowcount
+        if deleted:
+            db.commit()
+        else:
+            db.rollback()
+        invalidate_product(product_id)
+        if deleted:
+            reindex_product(version, product_id)
+
+        if deleted == 0:
             cur.close()
             db.close()
             return jsonify({"error": "Product not found"}), 404
@@ -220,5 +786,84 @@ def delete_product(product_id):
         return jsonify({"error": str(exc)}), 500
 
 
+CHANGES_CONSUMER_TTL_MINUTES = int(os.environ.get("PRODUCTS_CHANGES_CONSUMER_TTL_MINUTES", "60"))
+CHANGES_PRUNE_CHUNK_SIZE = int(os.environ.get("PRODUCTS_CHANGES_PRUNE_CHUNK_SIZE", "10000"))
+
+
+def prune_product_changes(db, stale_after_minutes=CHANGES_CONSUMER_TTL_MINUTES, chunk_size=CHANGES_PRUNE_CHUNK_SIZE):
+    """
+    Delete the product_changes rows every live consumer has applied.
+
+    Consumers that have not reported for stale_after_minutes are dropped
+    first so a stopped replica cannot hold the feed back forever. The cut-off
+    is recorded in catalog_version.changes_pruned_to before any row goes,
+    so a consumer behind it reloads instead of missing changes. Rows are
+    deleted chunk_size at a time, one transaction each. Returns
+    (cut-off version, rows deleted).
+    """
+    cur = db.cursor()
+    try:
+        cur.execute(
+            "DELETE FROM product_change_consumers WHERE updated_at < NOW() - INTERVAL %s MINUTE",
+            (stale_after_minutes,),
+        )
+        cur.execute("SELECT version FROM catalog_version WHERE id = 1")
+        row = cur.fetchone()
+        version = row[0] if row else 0
+        cur.execute("SELECT MIN(version) FROM product_change_consumers")
+        applied = cur.fetchone()[0]
+        pruned_to = version if applied is None else min(applied, version)
+        # updated_at = updated_at keeps the catalog's Last-Modified unchanged
+        cur.execute(
+            "UPDATE catalog_version SET changes_pruned_to = GREATEST(changes_pruned_to, %s), "
+            "updated_at = updated_at WHERE id = 1",
+            (pruned_to,),
+        )
+        db.commit()
+
+        deleted = 0
+        while True:
+            cur.execute(
+                "DELETE FROM product_changes WHERE version <= %s ORDER BY seq LIMIT %s", (pruned_to, chunk_size)
+            )
+            count = cur.rowcount
+            db.commit()
+            deleted += count
+            if count < chunk_size:
+                return pruned_to, deleted
+    except Error:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+@app.cli.command("prune-product-changes")
+@click.option("--stale-after-minutes", type=int, default=CHANGES_CONSUMER_TTL_MINUTES, show_default=True)
+@click.option("--chunk-size", type=int, default=CHANGES_PRUNE_CHUNK_SIZE, show_default=True)
+def prune_product_changes_command(stale_after_minutes, chunk_size):
+    """Delete product_changes rows that every price replica has applied."""
+    try:
+        db = db_pool.acquire()
+        try:
+            pruned_to, deleted = prune_product_changes(db, stale_after_minutes, chunk_size)
+        finally:
+            db.close()
+    except Error as exc:
+        raise click.ClickException(f"Pruning product changes failed: {exc}")
+    click.echo(f"Deleted {deleted} product changes up to version {pruned_to}")
+
+
+def migrate():
+    """Apply pending schema migrations; called once before serving."""
+    db = db_pool.acquire()
+    try:
+        return run_migrations(db, "products")
+    finally:
+        db.close()
+
+
 if __name__ == "__main__":
+    migrate()
+    start_pool(db_pool)
     app.run(host="0.0.0.0", port=5002, debug=False)
@@ -0,0 +1,136 @@
+"""
+In-process read-through cache for catalog reads.
+
+Entries expire after ttl seconds and the least recently used entry is
+evicted once max_entries is reached. Writers call invalidate() after they
+commit. A load that overlaps an invalidation is returned to its caller but
+not stored, so an old row cannot be re-cached after the write.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache with a per-entry time to live."""
+
+    def __init__(self, max_entries=1024, ttl=60.0, enabled=True):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._generation = 0  # bumped by every invalidation
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss."""
+        if not self.enabled:
+            return loader()
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return entry[1]
+                del self._entries[key]
+                self._counters["expirations"] += 1
+            self._counters["misses"] += 1
+            generation = self._generation
+
+        value = loader()
+
+        with self._lock:
+            if generation != self._generation:
+                return value
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+        return value
+
+    def get_or_load_many(self, keys, loader):
+        """
+        Return {key: value} for keys, calling loader(missing_keys) once for all misses.
+
+        loader must return a value for every key it is given.
+        """
+        if not self.enabled:
+            return loader(list(keys))
+
+        found = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    found[key] = entry[1]
+                    continue
+                if entry is not None:
+                    del self._entries[key]
+                    self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                missing.append(key)
+            generation = self._generation
+
+        if not missing:
+            return found
+        loaded = loader(missing)
+        found.update(loaded)
+
+        with self._lock:
+            if generation == self._generation:
+                expires_at = time.monotonic() + self.ttl
+                for key, value in loaded.items():
+                    self._entries[key] = (expires_at, value)
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._counters["evictions"] += 1
+        return found
+
+    def invalidate(self, *keys):
+        """Drop the given keys."""
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._counters["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._counters["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._counters)
+            data.update(
+                {
+                    "enabled": self.enabled,
+                    "entries": len(self._entries),
+                    "max_entries": self.max_entries,
+                    "ttl": self.ttl,
+                }
+            )
+        lookups = data["hits"] + data["misses"]
+        data["hit_ratio"] = data["hits"] / lookups if lookups else 0.0
+        return data
+
+
+def cache_from_env():
+    """Build the product cache from PRODUCTS_CACHE_* environment variables."""
+    return TTLCache(
+        max_entries=int(os.environ.get("PRODUCTS_CACHE_MAX_ENTRIES", "1024")),
+        ttl=float(os.environ.get("PRODUCTS_CACHE_TTL", "60")),
+        enabled=os.environ.get("PRODUCTS_CACHE_ENABLED", "1") != "0",
+    )
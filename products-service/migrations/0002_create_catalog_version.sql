@@ -0,0 +1,7 @@
+-- Single-row catalog version, bumped in the same transaction as every product write
+CREATE TABLE IF NOT EXISTS catalog_version (
+  id TINYINT PRIMARY KEY,
+  version BIGINT NOT NULL,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+INSERT IGNORE INTO catalog_version (id, version) VALUES (1, 1);
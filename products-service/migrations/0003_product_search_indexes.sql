@@ -0,0 +1,3 @@
+-- Ranked catalog search and price-range filtering for GET /products/search
+ALTER TABLE products ADD FULLTEXT INDEX ft_products_name_description (name, description);
+CREATE INDEX idx_products_price ON products (price);
@@ -0,0 +1,31 @@
+-- Append-only feed of product writes for services that keep a local copy of
+-- the catalog (orders-service prices orders from one). Each row carries the
+-- catalog version of the transaction that made it: writers bump
+-- catalog_version before touching products, and that row lock means versions
+-- become visible in order, so "every change with version <= V" is complete
+-- once catalog_version reads V.
+CREATE TABLE IF NOT EXISTS product_changes (
+  seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+  version BIGINT NOT NULL,
+  product_id INT NOT NULL,
+  name VARCHAR(100),
+  price DECIMAL(10, 2),
+  deleted TINYINT(1) NOT NULL DEFAULT 0,
+  changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_product_changes_version (version)
+);
+
+DROP TRIGGER IF EXISTS products_after_insert_change;
+CREATE TRIGGER products_after_insert_change AFTER INSERT ON products FOR EACH ROW
+  INSERT INTO product_changes (version, product_id, name, price)
+  SELECT version, NEW.id, NEW.name, NEW.price FROM catalog_version WHERE id = 1;
+
+DROP TRIGGER IF EXISTS products_after_update_change;
+CREATE TRIGGER products_after_update_change AFTER UPDATE ON products FOR EACH ROW
+  INSERT INTO product_changes (version, product_id, name, price)
+  SELECT version, NEW.id, NEW.name, NEW.price FROM catalog_version WHERE id = 1;
+
+DROP TRIGGER IF EXISTS products_after_delete_change;
+CREATE TRIGGER products_after_delete_change AFTER DELETE ON products FOR EACH ROW
+  INSERT INTO product_changes (version, product_id, deleted)
+  SELECT version, OLD.id, 1 FROM catalog_version WHERE id = 1;
@@ -0,0 +1,12 @@
+-- Retention for product_changes. Each consumer of the feed (one per
+-- orders-service price replica) records the catalog version it has applied;
+-- prune-product-changes deletes the rows every live consumer has applied and
+-- records the highest deleted version in changes_pruned_to, so a consumer
+-- that is further behind knows to reload from products instead.
+CREATE TABLE IF NOT EXISTS product_change_consumers (
+  consumer VARCHAR(100) PRIMARY KEY,
+  version BIGINT NOT NULL,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+ALTER TABLE catalog_version ADD COLUMN changes_pruned_to BIGINT NOT NULL DEFAULT 0;
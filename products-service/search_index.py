@@ -0,0 +1,139 @@
+"""
+Optional in-process inverted index over product name and description.
+
+Enabled with PRODUCTS_SEARCH_BACKEND=memory. The index remembers the catalog
+version it reflects. It is loaded from MySQL on first use and reloaded
+whenever the catalog version moves past it, which catches writes made by
+other workers. Writes made by this process are applied in place after they
+commit, provided the index is at the version just before theirs (advance());
+otherwise the index resets and reloads on the next search.
+
+Results are ranked by a TF-IDF score, which orders matches much like MySQL
+FULLTEXT natural-language mode.
+"""
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return [token for token in _TOKEN.findall((text or "").lower()) if len(token) > 1]
+
+
+class InvertedIndex:
+    """Thread-safe term -> {product_id: term_frequency} index."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs = {}  # product_id -> product dict
+        self._terms = {}  # product_id -> Counter of its terms
+        self._postings = {}  # term -> {product_id: tf}
+        self.loaded = False
+        self.version = None
+
+    def ensure_loaded(self, loader, version=None):
+        """Build the index from loader() unless it is loaded at version or later."""
+        with self._lock:
+            if not self.loaded or (version is not None and (self.version is None or version > self.version)):
+                self.load(loader(), version)
+
+    def advance(self, version):
+        """
+        Move the index to version for a local write; True if the write should be
+        applied in place. A gap means another writer got in between, so the
+        index is reset and False returned.
+        """
+        with self._lock:
+            if not self.loaded:
+                return False
+            if self.version is None or version in (self.version, self.version + 1):
+                self.version = version
+                return True
+            self.reset()
+            return False
+
+    def reset(self):
+        """Forget the index so the next search reloads it (used after bulk writes)."""
+        with self._lock:
+            self._docs.clear()
+            self._terms.clear()
+            self._postings.clear()
+            self.loaded = False
+            self.version = None
+
+    def load(self, products, version=None):
+        """Replace the index contents with products, as of catalog version."""
+        with self._lock:
+            self.version = version
+            self._docs.clear()
+            self._terms.clear()
+            self._postings.clear()
+            for product in products:
+                self._add(product)
+            self.loaded = True
+
+    def _add(self, product):
+        terms = Counter(tokenize(product.get("name")) + tokenize(product.get("description")))
+        self._docs[product["id"]] = product
+        self._terms[product["id"]] = terms
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[product["id"]] = tf
+
+    def remove(self, product_id):
+        with self._lock:
+            if not self.loaded:
+                return
+            self._docs.pop(product_id, None)
+            for term in self._terms.pop(product_id, {}):
+                posting = self._postings.get(term)
+                if posting is not None:
+                    posting.pop(product_id, None)
+                    if not posting:
+                        del self._postings[term]
+
+    def upsert(self, product_id, fields):
+        """Insert a product or merge changed fields into the indexed copy."""
+        with self._lock:
+            if not self.loaded:
+                return
+            product = dict(self._docs.get(product_id, {"id": product_id}))
+            product.update(fields)
+            self.remove(product_id)
+            self._add(product)
+
+    def search(self, query, min_price=None, max_price=None, limit=20):
+        """Return up to limit (score, product) pairs, best first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            total = len(self._docs)
+            scores = Counter()
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + total / len(posting))
+                for product_id, tf in posting.items():
+                    scores[product_id] += (1 + math.log(tf)) * idf
+
+            def in_range(product_id):
+                price = self._docs[product_id].get("price")
+                if min_price is not None and (price is None or price < min_price):
+                    return False
+                if max_price is not None and (price is None or price > max_price):
+                    return False
+                return True
+
+            best = heapq.nsmallest(
+                limit,
+                (pid for pid in scores if in_range(pid)),
+                key=lambda pid: (-scores[pid], pid),
+            )
+            return [(round(scores[pid], 6), dict(self._docs[pid])) for pid in best]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._docs)
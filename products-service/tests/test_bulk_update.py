@@ -0,0 +1,36 @@
+from app import app
+
+
+def test_bulk_update_groups_by_field_set(mock_db):
+    db, cur = mock_db
+    cur.fetchall.side_effect = [[(1,), (2,)], [(3,)]]
+
+    resp = app.test_client().patch(
+        "/products",
+        json=[
+            {"id": 1, "price": 5},
+            {"id": 2, "price": "6.5"},
+            {"id": 4, "price": 1},
+            {"id": 3, "name": "Renamed", "description": "New"},
+            {"id": 5},
+            {"id": 1, "price": 9},
+            {"id": 6, "price": "free"},
+        ],
+    )
+    assert resp.status_code == 200
+    assert [r["status"] for r in resp.json["results"]] == [
+        "updated", "updated", "not_found", "updated", "invalid", "invalid", "invalid",
+    ]
+    assert resp.json["updated"] == 3
+
+    updates = [c.args for c in cur.execute.call_args_list if c.args[0].startswith("UPDATE products SET")]
+    price_sql, price_params = updates[0]
+    assert price_sql.startswith("UPDATE products SET price = CASE id WHEN %s THEN %s WHEN %s THEN %s END")
+    assert price_params == [1, 5.0, 2, 6.5, 1, 2]
+    assert updates[1][0].startswith("UPDATE products SET name = CASE id WHEN %s THEN %s END, description = CASE id")
+    assert cur.execute.call_args_list[0].args[0].startswith("UPDATE catalog_version")
+    db.commit.assert_called_once()
+
+
+def test_bulk_update_rejects_non_array():
+    assert app.test_client().patch("/products", json={"id": 1}).status_code == 400
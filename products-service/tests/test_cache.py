@@ -0,0 +1,84 @@
+import time
+from unittest.mock import MagicMock
+
+from cache import TTLCache
+import app as products_app
+from app import app
+
+
+def test_cache_hits_after_first_load():
+    cache = TTLCache(max_entries=4, ttl=60)
+    loader = MagicMock(return_value=[1, 2])
+    assert cache.get_or_load("k", loader) == [1, 2]
+    assert cache.get_or_load("k", loader) == [1, 2]
+    assert loader.call_count == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.get_or_load("a", lambda: 1)
+    cache.get_or_load("b", lambda: 2)
+    cache.get_or_load("a", lambda: 1)
+    cache.get_or_load("c", lambda: 3)
+    loader = MagicMock(return_value=2)
+    cache.get_or_load("b", loader)
+    assert loader.called
+    assert cache.stats()["evictions"] >= 1
+
+
+def test_cache_entries_expire():
+    cache = TTLCache(ttl=0.01)
+    cache.get_or_load("k", lambda: 1)
+    time.sleep(0.02)
+    loader = MagicMock(return_value=2)
+    assert cache.get_or_load("k", loader) == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_load_racing_an_invalidation_is_not_stored():
+    cache = TTLCache()
+
+    def loader():
+        cache.invalidate("k")
+        return "stale"
+
+    cache.get_or_load("k", loader)
+    assert cache.stats()["entries"] == 0
+
+
+def test_disabled_cache_always_loads():
+    cache = TTLCache(enabled=False)
+    loader = MagicMock(return_value=1)
+    cache.get_or_load("k", loader)
+    cache.get_or_load("k", loader)
+    assert loader.call_count == 2
+
+
+def test_update_invalidates_cached_product(mock_db):
+    products_app.product_cache.clear()
+    _, cur = mock_db
+    cur.fetchone.return_value = {"id": 1, "name": "Old"}
+    cur.rowcount = 1
+    client = app.test_client()
+
+    assert client.get("/products/1").json["name"] == "Old"
+    assert client.get("/products/1").json["name"] == "Old"
+    assert cur.fetchone.call_count == 1
+
+    assert client.put("/products/1", json={"name": "New"}).status_code == 200
+    cur.fetchone.return_value = {"id": 1, "name": "New"}
+    assert client.get("/products/1").json["name"] == "New"
+    assert cur.fetchone.call_count == 2
+    assert client.get("/health/cache").json["hits"] == 1
+
+
+def test_get_or_load_many_loads_only_misses():
+    cache = TTLCache()
+    cache.get_or_load("a", lambda: 1)
+    loader = MagicMock(side_effect=lambda keys: {key: key.upper() for key in keys})
+
+    assert cache.get_or_load_many(["a", "b", "c"], loader) == {"a": 1, "b": "B", "c": "C"}
+    loader.assert_called_once_with(["b", "c"])
+    assert cache.get_or_load("b", lambda: "reloaded") == "B"
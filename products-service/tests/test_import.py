@@ -0,0 +1,70 @@
+import json
+
+from app import app
+
+
+def upserts(cur):
+    return [c.args for c in cur.execute.call_args_list if c.args[0].startswith("INSERT INTO products")]
+
+
+def test_import_csv_in_chunks(mock_db):
+    db, cur = mock_db
+    body = "id,name,price,description\n,Widget,9.99,A widget\n7,Gadget,,\n,Bad,-1,\n,Doohickey,3,\n"
+
+    resp = app.test_client().post("/products/import?chunk_size=2", data=body, content_type="text/csv")
+    assert resp.status_code == 200
+    assert resp.json["rows"] == 4
+    assert resp.json["written"] == 3
+    assert resp.json["errors"] == [{"line": 4, "error": "Price must be positive"}]
+
+    calls = upserts(cur)
+    assert len(calls) == 3
+    assert "ON DUPLICATE KEY UPDATE" in calls[0][0]
+    assert calls[0][1] == [None, "Widget", 9.99, "A widget"]
+    # Gadget has an id but no price: inserted at 0.0, an existing price is kept
+    assert calls[1][1] == [7, "Gadget", 0.0, ""]
+    assert "price = new.price" not in calls[1][0]
+    assert calls[2][1] == [None, "Doohickey", 3.0, ""]
+    assert db.commit.call_count == 2
+
+
+def test_import_ndjson_reports_bad_lines(mock_db):
+    lines = [
+        json.dumps({"name": "A", "price": 1}),
+        "{oops",
+        json.dumps({"price": 2}),
+        json.dumps({"id": "x", "name": "B"}),
+    ]
+
+    resp = app.test_client().post("/products/import", data="\n".join(lines), content_type="application/x-ndjson")
+    assert resp.status_code == 200
+    assert resp.json["written"] == 1
+    assert [e["line"] for e in resp.json["errors"]] == [2, 3, 4]
+
+
+def test_import_rejects_non_positive_ids(mock_db):
+    body = "id,name,price\n0,Zero,1\n-3,Negative,1\n4,Fine,1\n"
+
+    resp = app.test_client().post("/products/import", data=body, content_type="text/csv")
+    assert resp.status_code == 200
+    assert resp.json["written"] == 1
+    assert resp.json["errors"] == [
+        {"line": 2, "error": "id must be a positive integer"},
+        {"line": 3, "error": "id must be a positive integer"},
+    ]
+
+
+def test_import_reports_malformed_csv(mock_db):
+    _, cur = mock_db
+    body = "name,price\nWidget,1\n" + "x" * 200000 + ",2\n"
+
+    resp = app.test_client().post("/products/import", data=body, content_type="text/csv")
+    assert resp.status_code == 400
+    assert resp.json["line"] == 3
+    assert resp.json["error"].startswith("Malformed CSV")
+    assert upserts(cur) == []
+
+
+def test_import_rejects_unknown_content_type():
+    resp = app.test_client().post("/products/import", json=[{"name": "A"}])
+    assert resp.status_code == 415
@@ -0,0 +1,36 @@
+from app import app, prune_product_changes
+
+
+def test_prune_stops_at_slowest_live_consumer(mock_db):
+    db, cur = mock_db
+    cur.fetchone.side_effect = [(12,), (9,)]
+    cur.rowcount = 3
+
+    assert prune_product_changes(db, stale_after_minutes=30, chunk_size=5) == (9, 3)
+    statements = [c.args for c in cur.execute.call_args_list]
+    assert statements[0][0].startswith("DELETE FROM product_change_consumers")
+    assert statements[0][1] == (30,)
+    assert "changes_pruned_to = GREATEST(changes_pruned_to, %s)" in statements[3][0]
+    assert statements[3][1] == (9,)
+    # The cut-off is committed before any change row is deleted
+    assert statements[4][1] == (9, 5)
+    assert db.commit.call_count == 2
+
+
+def test_prune_without_consumers_clears_the_feed(mock_db):
+    db, cur = mock_db
+    cur.fetchone.side_effect = [(12,), (None,)]
+    cur.rowcount = 0
+
+    assert prune_product_changes(db) == (12, 0)
+
+
+def test_prune_command_echoes_summary(mock_db, monkeypatch):
+    db, cur = mock_db
+    cur.fetchone.side_effect = [(4,), (4,)]
+    cur.rowcount = 0
+    monkeypatch.setattr("app.db_pool.acquire", lambda: db)
+
+    result = app.test_cli_runner().invoke(args=["prune-product-changes"])
+    assert result.exit_code == 0
+    assert result.output == "Deleted 0 product changes up to version 4\n"
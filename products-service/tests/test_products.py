@@ -1,3 +1,8 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import app as products_app
 from app import app
 
 
@@ -8,6 +13,7 @@ def test_get_all_products(monkeypatch):
         return [{"id": 1, "name": "Laptop"}]
 
     monkeypatch.setattr("app.fetch_products", mock_fetch_products)
+    monkeypatch.setattr("app.catalog_state", lambda: (1, None))
 
     resp = client.get("/products")
     assert resp.status_code == 200
@@ -57,3 +63,103 @@ def test_create_product_bad_payload():
     client = app.test_client()
     resp = client.post("/products", json={})
     assert resp.status_code == 400
+
+
+def test_list_products_not_modified(monkeypatch):
+    client = app.test_client()
+
+    def fail_fetch_products():
+        raise AssertionError("catalog should not be read on a 304")
+
+    monkeypatch.setattr("app.fetch_products", fail_fetch_products)
+    monkeypatch.setattr("app.catalog_state", lambda: (7, datetime(2024, 1, 1, 12, 0, 0)))
+
+    resp = client.get("/products", headers={"If-None-Match": '"catalog-7"'})
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == '"catalog-7"'
+
+    resp = client.get("/products", headers={"If-Modified-Since": "Mon, 01 Jan 2024 12:00:00 GMT"})
+    assert resp.status_code == 304
+
+
+def test_list_products_changed_etag(monkeypatch):
+    client = app.test_client()
+    monkeypatch.setattr("app.fetch_products", lambda: [{"id": 1, "name": "Laptop"}])
+    monkeypatch.setattr("app.catalog_state", lambda: (8, datetime(2024, 1, 1, 12, 0, 0)))
+
+    resp = client.get("/products", headers={"If-None-Match": '"catalog-7"'})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] == '"catalog-8"'
+    assert resp.headers["Vary"] == "Accept"
+    assert resp.headers["Last-Modified"] == "Mon, 01 Jan 2024 12:00:00 GMT"
+
+
+def test_list_products_etag_is_per_representation(mock_db, monkeypatch):
+    stream_rows(mock_db, monkeypatch, [{"id": 1}])
+    client = app.test_client()
+    ndjson = {"Accept": "application/x-ndjson"}
+
+    # The JSON representation's ETag does not validate the NDJSON one
+    resp = client.get("/products", headers=dict(ndjson, **{"If-None-Match": '"catalog-1"'}))
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] == '"catalog-1-ndjson"'
+    assert resp.headers["Vary"] == "Accept"
+    resp.close()
+
+    resp = client.get("/products", headers=dict(ndjson, **{"If-None-Match": '"catalog-1-ndjson"'}))
+    assert resp.status_code == 304
+    resp = client.get("/products?stream=1", headers={"If-None-Match": '"catalog-1-ndjson"'})
+    assert resp.headers["ETag"] == '"catalog-1-stream"'
+    assert resp.status_code == 200
+    resp.close()
+
+
+def stream_rows(mock_db, monkeypatch, rows):
+    """Serve rows from mock_db's cursor two at a time, as fetchmany() would."""
+    _, cur = mock_db
+    cur.fetchmany.side_effect = [rows[i:i + 2] for i in range(0, len(rows), 2)] + [[]]
+    monkeypatch.setattr("app.catalog_state", lambda: (1, None))
+
+
+def test_list_products_streams_json_array(mock_db, monkeypatch):
+    stream_rows(mock_db, monkeypatch, [{"id": i, "price": Decimal("1.50")} for i in range(1, 4)])
+    db, cur = mock_db
+
+    resp = app.test_client().get("/products?stream=1")
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    assert [p["id"] for p in resp.json] == [1, 2, 3]
+    cur.close.assert_called_once()
+    db.close.assert_called_once()
+
+
+def test_list_products_streams_ndjson(mock_db, monkeypatch):
+    stream_rows(mock_db, monkeypatch, [{"id": 1}, {"id": 2}, {"id": 3}])
+
+    resp = app.test_client().get("/products", headers={"Accept": "application/x-ndjson"})
+    assert resp.mimetype == "application/x-ndjson"
+    lines = resp.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [1, 2, 3]
+
+
+def test_batch_fetch_preserves_order_and_reports_missing(mock_db):
+    products_app.product_cache.clear()
+    _, cur = mock_db
+    cur.fetchall.return_value = [{"id": 1, "name": "A"}, {"id": 3, "name": "C"}]
+    client = app.test_client()
+
+    resp = client.get("/products?ids=3,2,1")
+    assert resp.status_code == 200
+    assert [p["id"] for p in resp.json["products"]] == [3, 1]
+    assert resp.json["missing"] == [2]
+    sql, params = cur.execute.call_args.args
+    assert "IN (%s, %s, %s)" in sql
+    assert params == [3, 2, 1]
+
+    # Served from the cache entries fetch_product() shares
+    assert client.get("/products/3").json["name"] == "C"
+    assert cur.execute.call_count == 1
+
+
+def test_batch_fetch_rejects_bad_ids():
+    assert app.test_client().get("/products?ids=1,two").status_code == 400
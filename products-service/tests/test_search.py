@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+from app import app
+from search_index import InvertedIndex
+
+
+def catalog():
+    return [
+        {"id": 1, "name": "Blue Widget", "price": Decimal("9.99"), "description": "A useful widget"},
+        {"id": 2, "name": "Gadget", "price": Decimal("12.99"), "description": "Pairs with any widget"},
+        {"id": 3, "name": "Doohickey", "price": Decimal("15.99"), "description": "Fantastic"},
+    ]
+
+
+def test_index_ranks_by_term_frequency():
+    index = InvertedIndex()
+    index.load(catalog())
+    results = index.search("widget")
+    assert [p["id"] for _, p in results] == [1, 2]
+
+
+def test_index_filters_by_price():
+    index = InvertedIndex()
+    index.load(catalog())
+    assert [p["id"] for _, p in index.search("widget", min_price=10)] == [2]
+    assert [p["id"] for _, p in index.search("widget", max_price=10)] == [1]
+
+
+def test_index_applies_writes_incrementally():
+    index = InvertedIndex()
+    index.upsert(9, {"name": "ignored before load"})
+    assert len(index) == 0
+
+    index.load(catalog())
+    index.upsert(3, {"description": "Now a widget too"})
+    assert 3 in [p["id"] for _, p in index.search("widget")]
+    index.remove(1)
+    assert [p["id"] for _, p in index.search("blue")] == []
+
+
+def test_search_endpoint_uses_fulltext(mock_db):
+    _, cur = mock_db
+    cur.fetchall.return_value = [{"id": 1, "name": "Blue Widget", "score": 1.5}]
+
+    resp = app.test_client().get("/products/search?q=widget&max_price=10&limit=5")
+    assert resp.status_code == 200
+    assert resp.json[0]["id"] == 1
+    sql, params = cur.execute.call_args.args
+    assert "MATCH(name, description) AGAINST" in sql
+    assert params == ["widget", "widget", 10.0, 5]
+
+
+def test_search_endpoint_memory_backend(monkeypatch):
+    index = InvertedIndex()
+    monkeypatch.setattr("app.SEARCH_BACKEND", "memory")
+    monkeypatch.setattr("app.search_index", index)
+    monkeypatch.setattr("app._query_products", catalog)
+    monkeypatch.setattr("app.catalog_state", lambda: (4, None))
+
+    resp = app.test_client().get("/products/search?q=gadget")
+    assert [p["id"] for p in resp.json] == [2]
+    assert resp.json[0]["score"] > 0
+    assert index.version == 4
+
+
+def test_index_reloads_when_catalog_version_moves():
+    index = InvertedIndex()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return catalog()
+
+    index.ensure_loaded(loader, 5)
+    index.ensure_loaded(loader, 5)
+    assert len(loads) == 1
+    # Another worker wrote version 6: this process has not seen it, so reload
+    index.ensure_loaded(loader, 6)
+    assert len(loads) == 2
+    assert index.version == 6
+
+
+def test_index_resets_on_version_gap():
+    index = InvertedIndex()
+    index.load(catalog(), 5)
+    assert index.advance(6)
+    assert index.version == 6
+    # Version 7 was written elsewhere, so applying 8 in place would miss it
+    assert not index.advance(8)
+    assert not index.loaded
+
+
+def test_search_endpoint_validates_params():
+    client = app.test_client()
+    assert client.get("/products/search").status_code == 400
+    assert client.get("/products/search?q=x&min_price=cheap").status_code == 400
+    assert client.get("/products/search?q=x&limit=0").status_code == 400
@@ -0,0 +1,166 @@
+"""
+Compare per-order latency of the old and new create_order write paths.
+
+  legacy     - SELECT user, SELECT product, INSERT, COMMIT (4 round trips)
+  procedure  - CALL create_order(...), COMMIT (2 round trips)
+
+Both paths run on the same reused connection, so the difference is the
+statements alone; --fresh-connections opens a new connection per order for
+both instead. With a reused connection the round trips per order are
+measured from the server's Questions counter.
+
+Run against a database initialised with scripts/init_db.sql after the orders
+service has applied its migrations:
+
+  DB_HOST=127.0.0.1 python scripts/bench_create_order.py --orders 500
+
+Orders created by the benchmark are deleted when it finishes, and the
+procedure's additions to order_stats_daily / order_stats_product are
+subtracted again in the same transaction, so the sales aggregates are left
+as they were.
+"""
+import argparse
+import os
+import statistics
+import time
+
+import mysql.connector
+
+
+def connect():
+    return mysql.connector.connect(
+        host=os.environ.get("DB_HOST", "127.0.0.1"),
+        user=os.environ.get("DB_USER", "root"),
+        password=os.environ.get("DB_PASS", "rootpass"),
+        database=os.environ.get("DB_NAME", "capstone"),
+    )
+
+
+def questions(db):
+    """Statements the server has received on this connection (SHOW STATUS itself included)."""
+    cur = db.cursor()
+    cur.execute("SHOW SESSION STATUS LIKE 'Questions'")
+    value = int(cur.fetchone()[1])
+    cur.close()
+    return value
+
+
+def legacy_order(db, user_id, product_id, quantity):
+    cur = db.cursor(dictionary=True)
+    cur.execute("SELECT id FROM users WHERE id = %s", (user_id,))
+    cur.fetchone()
+    cur.execute("SELECT id, price FROM products WHERE id = %s", (product_id,))
+    product = cur.fetchone()
+    cur.execute(
+        "INSERT INTO orders (user_id, product_id, quantity, status, total_price) VALUES (%s, %s, %s, %s, %s)",
+        (user_id, product_id, quantity, "created", float(product["price"]) * quantity),
+    )
+    db.commit()
+    order_id = cur.lastrowid
+    cur.close()
+    return order_id
+
+
+def procedure_order(db, user_id, product_id, quantity):
+    cur = db.cursor(dictionary=True)
+    row = None
+    for result in cur.execute("CALL create_order(%s, %s, %s)", (user_id, product_id, quantity), multi=True):
+        if result.with_rows:
+            rows = result.fetchall()
+            row = row or rows[0]
+    db.commit()
+    cur.close()
+    return row["id"]
+
+
+def run(name, create, db, orders, user_id, product_id, fresh_connections, created):
+    """Create orders with create, appending their ids to created as it goes."""
+    timings = []
+    before = None if fresh_connections else questions(db)
+    for _ in range(orders):
+        started = time.perf_counter()
+        if fresh_connections:
+            conn = connect()
+            created.append(create(conn, user_id, product_id, 1))
+            conn.close()
+        else:
+            created.append(create(db, user_id, product_id, 1))
+        timings.append((time.perf_counter() - started) * 1000)
+    # The second SHOW STATUS is counted too
+    round_trips = "n/a" if before is None else "%.1f" % ((questions(db) - before - 1) / orders)
+    timings.sort()
+    print(
+        "%-10s n=%d mean=%.2fms p50=%.2fms p99=%.2fms round_trips/order=%s"
+        % (
+            name,
+            orders,
+            statistics.mean(timings),
+            timings[len(timings) // 2],
+            timings[int(len(timings) * 0.99) - 1],
+            round_trips,
+        )
+    )
+
+
+def remove_orders(db, legacy_ids, procedure_ids):
+    """
+    Delete the benchmark's orders in one transaction. Orders from the
+    procedure were also added to the sales aggregates, so their count, units
+    and revenue are taken off again per day and per product first.
+    """
+    cur = db.cursor()
+    try:
+        for start in range(0, len(procedure_ids), 1000):
+            chunk = procedure_ids[start:start + 1000]
+            cur.execute(
+                "SELECT DATE(created_at), product_id, COUNT(*), SUM(quantity), SUM(total_price) FROM orders "
+                "WHERE id IN (%s) GROUP BY DATE(created_at), product_id" % ", ".join(["%s"] * len(chunk)),
+                chunk,
+            )
+            for day, product_id, count, units, revenue in cur.fetchall():
+                for table, key, value in (
+                    ("order_stats_daily", "day", day),
+                    ("order_stats_product", "product_id", product_id),
+                ):
+                    cur.execute(
+                        f"UPDATE {table} SET order_count = order_count - %s, quantity = quantity - %s, "
+                        f"revenue = revenue - %s WHERE {key} = %s",
+                        (count, units, revenue, value),
+                    )
+        created = legacy_ids + procedure_ids
+        for start in range(0, len(created), 1000):
+            chunk = created[start:start + 1000]
+            cur.execute("DELETE FROM orders WHERE id IN (%s)" % ", ".join(["%s"] * len(chunk)), chunk)
+        db.commit()
+    except mysql.connector.Error:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--product-id", type=int, default=1)
+    parser.add_argument("--fresh-connections", action="store_true", help="connect per order on both paths")
+    args = parser.parse_args()
+
+    db = connect()
+    # The legacy path does not touch the aggregates; the procedure does
+    legacy_ids = []
+    procedure_ids = []
+    try:
+        for name, create, created in (
+            ("legacy", legacy_order, legacy_ids),
+            ("procedure", procedure_order, procedure_ids),
+        ):
+            run(name, create, db, args.orders, args.user_id, args.product_id, args.fresh_connections, created)
+    finally:
+        remove_orders(db, legacy_ids, procedure_ids)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
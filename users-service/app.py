@@ -1,11 +1,26 @@
 from flask import Flask, request, jsonify
+import base64
+import binascii
+import json
 import os
+from urllib.parse import urlencode
 import mysql.connector
+from mysql.connector import IntegrityError
+
+from db_pool import checkout, init_app, pool_from_env, start_pool
+from migrations import run_migrations
 
 app = Flask(__name__)
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+BULK_BATCH_SIZE = int(os.environ.get("USERS_BULK_BATCH_SIZE", "1000"))
+# name and email are VARCHAR(100); longer values would fail the whole batch.
+MAX_FIELD_LENGTH = 100
 
-def get_db():
+
+def _connect():
+    """Open a new database connection."""
     return mysql.connector.connect(
         host=os.environ.get("DB_HOST", "mysql"),
         user=os.environ.get("DB_USER", "root"),
@@ -14,32 +29,164 @@ def get_db():
     )
 
 
+db_pool = pool_from_env(_connect)
+init_app(app)
+
+
+def get_db():
+    """Check out a pooled connection bound to the current app context."""
+    return checkout(db_pool)
+
+
 @app.route("/health", methods=["GET"])
 def health():
     """Health check endpoint"""
     return jsonify({"status": "healthy"}), 200
 
 
+@app.route("/health/db-pool", methods=["GET"])
+def db_pool_stats():
+    """Connection pool gauges and counters"""
+    return jsonify(db_pool.stats()), 200
+
+
+def encode_cursor(last_id):
+    """Opaque page cursor for the row after last_id."""
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Return the id encoded by encode_cursor, or raise ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError) as exc:
+        raise ValueError("invalid cursor") from exc
+    prefix, _, value = raw.partition(":")
+    if prefix != "id" or not value.isdigit():
+        raise ValueError("invalid cursor")
+    return int(value)
+
+
+def parse_page_size(value):
+    """Parse ?limit=, defaulting to DEFAULT_PAGE_SIZE; raise ValueError if out of range."""
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    limit = int(value)
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def parse_id_list(value):
+    """Parse ?ids=1,2,3 into a de-duplicated list of ints, keeping request order."""
+    ids = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            raise ValueError(f"invalid id: {part}")
+        if int(part) not in ids:
+            ids.append(int(part))
+    if not ids:
+        raise ValueError("ids must not be empty")
+    if len(ids) > MAX_PAGE_SIZE:
+        raise ValueError(f"at most {MAX_PAGE_SIZE} ids per request")
+    return ids
+
+
+def fetch_users_by_ids(ids):
+    """Return the users with the given ids, in the order requested, in one query."""
+    db = get_db()
+    cur = db.cursor(dictionary=True)
+    try:
+        placeholders = ", ".join(["%s"] * len(ids))
+        cur.execute(f"SELECT id, name, email FROM users WHERE id IN ({placeholders})", ids)
+        by_id = {row["id"]: row for row in cur.fetchall()}
+        return [by_id[user_id] for user_id in ids if user_id in by_id]
+    finally:
+        cur.close()
+        db.close()
+
+
+def fetch_user_by_email(email):
+    """Return the user with this email (UNIQUE index) or None."""
+    db = get_db()
+    cur = db.cursor(dictionary=True)
+    try:
+        cur.execute("SELECT id, name, email FROM users WHERE email = %s", (email,))
+        return cur.fetchone()
+    finally:
+        cur.close()
+        db.close()
+
+
+@app.route("/users/<int:user_id>", methods=["GET"])
+def get_user(user_id):
+    """Get a specific user by ID."""
+    try:
+        users = fetch_users_by_ids([user_id])
+    except mysql.connector.Error as exc:
+        return jsonify({"error": str(exc)}), 500
+    if users:
+        return jsonify(users[0]), 200
+    return jsonify({"error": "User not found"}), 404
+
+
 @app.route("/users", methods=["GET"])
 def list_users():
+    """
+    List users ordered by id, one keyset page at a time.
+
+    ?limit= sets the page size and ?after= takes the cursor from the previous
+    page's X-Next-Cursor header. The Link header carries the next page URL.
+
+    ?ids=1,2,3 instead returns just those users (missing ids are left out) and
+    ?email= returns a list with the matching user, if any.
+    """
+    if "ids" in request.args:
+        try:
+            ids = parse_id_list(request.args["ids"])
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        try:
+            return jsonify(fetch_users_by_ids(ids)), 200
+        except mysql.connector.Error as exc:
+            return jsonify({"error": str(exc)}), 500
+
+    if "email" in request.args:
+        try:
+            user = fetch_user_by_email(request.args["email"])
+        except mysql.connector.Error as exc:
+            return jsonify({"error": str(exc)}), 500
+        return jsonify([user] if user else []), 200
+
+    try:
+        limit = parse_page_size(request.args.get("limit"))
+        after = decode_cursor(request.args["after"]) if request.args.get("after") else 0
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
     try:
         db = get_db()
         cur = db.cursor(dictionary=True)
 
+        # One extra row tells us whether another page exists
         cur.execute(
-            "CREATE TABLE IF NOT EXISTS users ("
-            "id INT AUTO_INCREMENT PRIMARY KEY, "
-            "name VARCHAR(100), "
-            "email VARCHAR(100)"
-            ");"
+            "SELECT id, name, email FROM users WHERE id > %s ORDER BY id LIMIT %s",
+            (after, limit + 1),
         )
-
-        cur.execute("SELECT id, name, email FROM users LIMIT 100;")
         rows = cur.fetchall()
 
         cur.close()
         db.close()
-        return jsonify(rows), 200
+
+        response = jsonify(rows[:limit])
+        if len(rows) > limit:
+            cursor = encode_cursor(rows[limit - 1]["id"])
+            response.headers["X-Next-Cursor"] = cursor
+            response.headers["Link"] = f'</users?{urlencode({"limit": limit, "after": cursor})}>; rel="next"'
+        return response, 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -67,5 +214,140 @@ def create_user():
     return jsonify({"message": "created"}), 201
 
 
+def _iter_ndjson(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def bulk_rows():
+    """
+    Return an iterator over the request's rows.
+
+    application/x-ndjson bodies are read line by line from the stream; anything
+    else must be a JSON array. Undecodable NDJSON lines are yielded as None.
+    """
+    if request.mimetype == "application/x-ndjson":
+        return _iter_ndjson(request.stream)
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, list):
+        raise ValueError("expected a JSON array of users or an application/x-ndjson body")
+    return iter(payload)
+
+
+def valid_user_row(row):
+    return (
+        isinstance(row, dict)
+        and isinstance(row.get("name"), str) and row["name"].strip() != ""
+        and len(row["name"]) <= MAX_FIELD_LENGTH
+        and isinstance(row.get("email"), str) and "@" in row["email"]
+        and len(row["email"]) <= MAX_FIELD_LENGTH
+    )
+
+
+def insert_user_batch(cur, batch):
+    """
+    Insert [(index, name, email)] with one multi-row INSERT.
+
+    Emails already in the table or repeated within the batch are reported as
+    duplicates up front. If a concurrent writer still trips the UNIQUE key the
+    failed statement is rolled back and the batch is retried row by row.
+    Returns {index: status}.
+    """
+    statuses = {}
+    placeholders = ", ".join(["%s"] * len(batch))
+    cur.execute(
+        f"SELECT email FROM users WHERE email IN ({placeholders})",
+        [email for _, _, email in batch],
+    )
+    seen = {row[0].lower() for row in cur.fetchall()}
+
+    pending = []
+    for index, name, email in batch:
+        if email.lower() in seen:
+            statuses[index] = "duplicate"
+        else:
+            seen.add(email.lower())
+            pending.append((index, name, email))
+    if not pending:
+        return statuses
+
+    values = ", ".join(["(%s, %s)"] * len(pending))
+    params = [value for _, name, email in pending for value in (name, email)]
+    try:
+        cur.execute(f"INSERT INTO users (name, email) VALUES {values}", params)
+        statuses.update((index, "created") for index, _, _ in pending)
+    except IntegrityError:
+        for index, name, email in pending:
+            try:
+                cur.execute("INSERT INTO users (name, email) VALUES (%s, %s)", (name, email))
+                statuses[index] = "created"
+            except IntegrityError:
+                statuses[index] = "duplicate"
+    return statuses
+
+
+@app.route("/users/bulk", methods=["POST"])
+def create_users_bulk():
+    """
+    Create many users in one transaction.
+
+    Accepts a JSON array or an NDJSON stream of {"name", "email"} objects and
+    returns a status per input row: created, duplicate or invalid.
+    """
+    try:
+        rows = bulk_rows()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    statuses = {}
+    batch = []
+    total = 0
+    db = None
+    try:
+        db = get_db()
+        cur = db.cursor()
+        for index, row in enumerate(rows):
+            total += 1
+            if not valid_user_row(row):
+                statuses[index] = "invalid"
+                continue
+            batch.append((index, row["name"].strip(), row["email"].strip()))
+            if len(batch) >= BULK_BATCH_SIZE:
+                statuses.update(insert_user_batch(cur, batch))
+                batch = []
+        if batch:
+            statuses.update(insert_user_batch(cur, batch))
+        db.commit()
+        cur.close()
+        db.close()
+    except mysql.connector.Error as exc:
+        if db is not None:
+            db.rollback()
+        return jsonify({"error": str(exc)}), 500
+
+    results = [{"index": index, "status": statuses[index]} for index in range(total)]
+    counts = {"created": 0, "duplicate": 0, "invalid": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return jsonify({"total": total, **counts, "results": results}), 200
+
+
+def migrate():
+    """Apply pending schema migrations; called once before serving."""
+    db = db_pool.acquire()
+    try:
+        return run_migrations(db, "users")
+    finally:
+        db.close()
+
+
 if __name__ == "__main__":
+    migrate()
+    start_pool(db_pool)
     app.run(host="0.0.0.0", port=5001)
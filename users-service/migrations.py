@@ -0,0 +1,116 @@
+"""
+Versioned schema migrations applied once at service startup.
+
+Migrations are plain SQL files named NNNN_description.sql in the service's
+migrations/ directory. Applied versions are recorded per service in the
+schema_migrations table. A MySQL named lock serialises runners so several
+replicas can start at the same time; the ones that wait find the versions
+already recorded and apply nothing.
+"""
+import os
+import re
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+LOCK_NAME = "capstone_schema_migrations"
+
+_FILENAME = re.compile(r"^(\d+)_[\w-]+\.sql$")
+
+
+class MigrationError(RuntimeError):
+    """Raised when the migration lock cannot be taken or a migration fails."""
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Return [(version, filename, statements)] sorted by version."""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = _FILENAME.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(directory, filename), encoding="utf-8") as handle:
+            migrations.append((int(match.group(1)), filename, split_statements(handle.read())))
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise MigrationError("duplicate migration version in %s" % directory)
+    return migrations
+
+
+def split_statements(sql):
+    """
+    Split a SQL script into statements, dropping '--' comment lines.
+
+    Statements end with ';' at the end of a line. As in the mysql client, a
+    'DELIMITER $$' line switches the terminator so stored routine bodies can
+    contain ';'.
+    """
+    statements = []
+    lines = []
+    delimiter = ";"
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("--"):
+            continue
+        if stripped.upper().startswith("DELIMITER "):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        if stripped.endswith(delimiter):
+            lines.append(line.rstrip()[: -len(delimiter)])
+            statement = "\n".join(lines).strip()
+            if statement:
+                statements.append(statement)
+            lines = []
+        else:
+            lines.append(line)
+    statement = "\n".join(lines).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def run_migrations(db, service, directory=MIGRATIONS_DIR, lock_timeout=60):
+    """
+    Apply pending migrations for service on connection db.
+
+    Returns the list of versions applied by this call.
+    """
+    cur = db.cursor()
+    try:
+        cur.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, lock_timeout))
+        (locked,) = cur.fetchone()
+        if locked != 1:
+            raise MigrationError("could not acquire migration lock within %ss" % lock_timeout)
+        try:
+            cur.execute(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "service VARCHAR(50) NOT NULL, "
+                "version INT NOT NULL, "
+                "name VARCHAR(255) NOT NULL, "
+                "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "
+                "PRIMARY KEY (service, version)"
+                ")"
+            )
+            cur.execute("SELECT version FROM schema_migrations WHERE service = %s", (service,))
+            applied = {row[0] for row in cur.fetchall()}
+
+            done = []
+            for version, name, statements in load_migrations(directory):
+                if version in applied:
+                    continue
+                try:
+                    for statement in statements:
+                        cur.execute(statement)
+                    cur.execute(
+                        "INSERT INTO schema_migrations (service, version, name) VALUES (%s, %s, %s)",
+                        (service, version, name),
+                    )
+                    db.commit()
+                except Exception as exc:
+                    db.rollback()
+                    raise MigrationError("migration %s failed: %s" % (name, exc)) from exc
+                done.append(version)
+            return done
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cur.fetchone()
+    finally:
+        cur.close()
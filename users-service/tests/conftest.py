@@ -0,0 +1,12 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+@pytest.fixture
+def mock_db():
+    with patch("app.get_db") as mock:
+        db = MagicMock()
+        cursor = MagicMock()
+        db.cursor.return_value = cursor
+        mock.return_value = db
+        yield db, cursor
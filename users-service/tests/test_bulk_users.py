@@ -0,0 +1,75 @@
+import json
+
+from mysql.connector import IntegrityError
+
+from app import app
+
+
+def test_bulk_create_reports_per_row_status(mock_db):
+    db, cursor = mock_db
+    cursor.fetchall.return_value = [("taken@example.com",)]
+
+    resp = app.test_client().post(
+        "/users/bulk",
+        json=[
+            {"name": "A", "email": "a@example.com"},
+            {"name": "B", "email": "TAKEN@example.com"},
+            {"name": "C"},
+            {"name": "D", "email": "a@example.com"},
+        ],
+    )
+    assert resp.status_code == 200
+    assert [r["status"] for r in resp.json["results"]] == ["created", "duplicate", "invalid", "duplicate"]
+    assert resp.json["created"] == 1
+    insert_sql, params = cursor.execute.call_args.args
+    assert insert_sql.startswith("INSERT INTO users (name, email) VALUES (%s, %s)")
+    assert params == ["A", "a@example.com"]
+    db.commit.assert_called_once()
+
+
+def test_bulk_create_accepts_ndjson(mock_db):
+    db, cursor = mock_db
+    cursor.fetchall.return_value = []
+    lines = [json.dumps({"name": "A", "email": "a@x.io"}), "not json", json.dumps({"name": "B", "email": "b@x.io"})]
+    body = "\n".join(lines)
+
+    resp = app.test_client().post("/users/bulk", data=body, content_type="application/x-ndjson")
+    assert resp.status_code == 200
+    assert [r["status"] for r in resp.json["results"]] == ["created", "invalid", "created"]
+    insert_sql, params = cursor.execute.call_args.args
+    assert insert_sql.count("(%s, %s)") == 2
+
+
+def test_bulk_create_falls_back_to_single_rows_on_race(mock_db):
+    db, cursor = mock_db
+    cursor.fetchall.return_value = []
+    cursor.execute.side_effect = [None, IntegrityError("dup"), None, IntegrityError("dup")]
+
+    resp = app.test_client().post(
+        "/users/bulk",
+        json=[{"name": "A", "email": "a@x.io"}, {"name": "B", "email": "b@x.io"}],
+    )
+    assert [r["status"] for r in resp.json["results"]] == ["created", "duplicate"]
+
+
+def test_bulk_create_rejects_non_array():
+    resp = app.test_client().post("/users/bulk", json={"name": "A"})
+    assert resp.status_code == 400
+
+
+def test_bulk_create_rejects_overlong_fields(mock_db):
+    db, cursor = mock_db
+    cursor.fetchall.return_value = []
+
+    resp = app.test_client().post(
+        "/users/bulk",
+        json=[
+            {"name": "A" * 101, "email": "a@x.io"},
+            {"name": "B", "email": "b" * 100 + "@x.io"},
+            {"name": "C", "email": "c@x.io"},
+        ],
+    )
+    assert resp.status_code == 200
+    assert [r["status"] for r in resp.json["results"]] == ["invalid", "invalid", "created"]
+    insert_sql, params = cursor.execute.call_args.args
+    assert params == ["C", "c@x.io"]
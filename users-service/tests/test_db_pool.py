@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+from unittest.mock import MagicMock
+
+from db_pool import ConnectionPool, PoolTimeout
+
+
+def make_pool(**kwargs):
+    conns = []
+
+    def connect():
+        conn = MagicMock()
+        conn.is_connected.return_value = True
+        conns.append(conn)
+        return conn
+
+    return ConnectionPool(connect, **kwargs), conns
+
+
+def test_connection_is_reused_after_close():
+    pool, conns = make_pool(max_size=2)
+    first = pool.acquire()
+    first.close()
+    second = pool.acquire()
+    assert len(conns) == 1
+    assert second._conn is conns[0]
+    stats = pool.stats()
+    assert stats["checkouts"] == 2
+    assert stats["in_use"] == 1
+    assert stats["created"] == 1
+
+
+def test_double_close_releases_once():
+    pool, _ = make_pool()
+    conn = pool.acquire()
+    conn.close()
+    conn.close()
+    assert pool.stats()["idle"] == 1
+    assert pool.stats()["in_use"] == 0
+
+
+def test_acquire_times_out_when_exhausted():
+    pool, _ = make_pool(max_size=1, timeout=0.05)
+    pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_waiter_gets_released_connection():
+    pool, conns = make_pool(max_size=1, timeout=2)
+    held = pool.acquire()
+    result = {}
+
+    def worker():
+        result["conn"] = pool.acquire()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    time.sleep(0.05)
+    assert pool.stats()["waiting"] == 1
+    held.close()
+    thread.join()
+    assert result["conn"]._conn is conns[0]
+    assert pool.stats()["waits"] == 1
+
+
+def test_pre_ping_discards_dead_connection():
+    pool, conns = make_pool(ping_after=0)
+    pool.acquire().close()
+    time.sleep(0.01)
+    conns[0].is_connected.return_value = False
+    conn = pool.acquire()
+    assert conn._conn is conns[1]
+    assert pool.stats()["discarded"] == 1
+
+
+def test_recently_used_connection_is_not_pinged():
+    pool, conns = make_pool(ping_after=30)
+    pool.acquire().close()
+    pool.acquire()
+    conns[0].is_connected.assert_not_called()
+
+
+def test_start_pool_warms_and_registers_close(monkeypatch):
+    import db_pool
+
+    registered = []
+    monkeypatch.setattr(db_pool.atexit, "register", registered.append)
+    pool, conns = make_pool(min_size=2, max_size=4)
+    db_pool.start_pool(pool)
+    assert len(conns) == 2
+    assert registered == [pool.close_all]
+
+
+def test_idle_connections_are_evicted_above_min_size():
+    pool, conns = make_pool(min_size=1, max_size=3, idle_timeout=0)
+    a, b = pool.acquire(), pool.acquire()
+    a.close()
+    b.close()
+    time.sleep(0.01)
+    pool.acquire()
+    stats = pool.stats()
+    assert stats["evicted"] == 1
+    assert stats["size"] == 1
+
+
+def test_warm_opens_min_size():
+    pool, conns = make_pool(min_size=2, max_size=4)
+    pool.warm()
+    assert len(conns) == 2
+    assert pool.stats()["idle"] == 2
+
+
+def test_pool_stats_endpoint():
+    from app import app
+
+    client = app.test_client()
+    resp = client.get("/health/db-pool")
+    assert resp.status_code == 200
+    assert "in_use" in resp.json
+
+
+def test_release_skips_rollback_outside_transaction():
+    pool, conns = make_pool()
+    conn = pool.acquire()
+    conns[0].in_transaction = False
+    conn.close()
+    conns[0].rollback.assert_not_called()
+
+    conn = pool.acquire()
+    conns[0].in_transaction = True
+    conn.close()
+    conns[0].rollback.assert_called_once()
@@ -0,0 +1,82 @@
+import pytest
+from unittest.mock import MagicMock
+
+from migrations import MigrationError, load_migrations, run_migrations, split_statements
+
+
+def write(tmp_path, name, sql):
+    (tmp_path / name).write_text(sql)
+
+
+def make_db(applied=(), locked=1):
+    db = MagicMock()
+    cur = MagicMock()
+    db.cursor.return_value = cur
+    cur.fetchone.return_value = (locked,)
+    cur.fetchall.return_value = [(v,) for v in applied]
+    return db, cur
+
+
+def executed(cur):
+    return [c.args[0] for c in cur.execute.call_args_list]
+
+
+def test_split_statements_drops_comments():
+    sql = "-- heading\nCREATE TABLE a (id INT);\n\nCREATE INDEX i ON a (id);\n"
+    assert split_statements(sql) == ["CREATE TABLE a (id INT)", "CREATE INDEX i ON a (id)"]
+
+
+def test_load_migrations_orders_by_version(tmp_path):
+    write(tmp_path, "0002_b.sql", "SELECT 2;")
+    write(tmp_path, "0001_a.sql", "SELECT 1;")
+    write(tmp_path, "README.txt", "ignored")
+    assert [m[0] for m in load_migrations(str(tmp_path))] == [1, 2]
+
+
+def test_duplicate_versions_rejected(tmp_path):
+    write(tmp_path, "0001_a.sql", "SELECT 1;")
+    write(tmp_path, "0001_b.sql", "SELECT 1;")
+    with pytest.raises(MigrationError):
+        load_migrations(str(tmp_path))
+
+
+def test_run_applies_only_pending(tmp_path):
+    write(tmp_path, "0001_a.sql", "CREATE TABLE a (id INT);")
+    write(tmp_path, "0002_b.sql", "CREATE TABLE b (id INT);")
+    db, cur = make_db(applied=[1])
+
+    assert run_migrations(db, "users", str(tmp_path)) == [2]
+    statements = executed(cur)
+    assert "CREATE TABLE b (id INT)" in statements
+    assert "CREATE TABLE a (id INT)" not in statements
+    assert statements[-1].startswith("SELECT RELEASE_LOCK")
+    db.commit.assert_called_once()
+
+
+def test_run_fails_without_lock(tmp_path):
+    write(tmp_path, "0001_a.sql", "CREATE TABLE a (id INT);")
+    db, cur = make_db(locked=0)
+    with pytest.raises(MigrationError):
+        run_migrations(db, "users", str(tmp_path))
+
+
+def test_service_migrations_load():
+    assert load_migrations()[0][0] == 1
+
+
+def test_split_statements_honours_delimiter():
+    sql = (
+        "DROP PROCEDURE IF EXISTS p;\n"
+        "DELIMITER $$\n"
+        "CREATE PROCEDURE p()\n"
+        "BEGIN\n"
+        "  SELECT 1;\n"
+        "END$$\n"
+        "DELIMITER ;\n"
+        "SELECT 2;\n"
+    )
+    assert split_statements(sql) == [
+        "DROP PROCEDURE IF EXISTS p",
+        "CREATE PROCEDURE p()\nBEGIN\n  SELECT 1;\nEND",
+        "SELECT 2",
+    ]
@@ -1,7 +1,81 @@
-from app import app
+from app import app, decode_cursor, encode_cursor
 
 
 def test_index_ok(monkeypatch):
     client = app.test_client()
     resp = client.get("/users")
     assert resp.status_code in (200, 500)
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42)) == 42
+
+
+def test_list_users_first_page_has_next_cursor(mock_db):
+    db, cursor = mock_db
+    cursor.fetchall.return_value = [{"id": i, "name": "u", "email": f"u{i}@x"} for i in (1, 2, 3)]
+
+    resp = app.test_client().get("/users?limit=2")
+    assert resp.status_code == 200
+    assert [u["id"] for u in resp.json] == [1, 2]
+    assert decode_cursor(resp.headers["X-Next-Cursor"]) == 2
+    assert 'rel="next"' in resp.headers["Link"]
+    assert cursor.execute.call_args.args[1] == (0, 3)
+
+
+def test_list_users_after_cursor(mock_db):
+    db, cursor = mock_db
+    cursor.fetchall.return_value = [{"id": 11, "name": "u", "email": "u11@x"}]
+
+    resp = app.test_client().get(f"/users?limit=5&after={encode_cursor(10)}")
+    assert resp.status_code == 200
+    assert "X-Next-Cursor" not in resp.headers
+    assert cursor.execute.call_args.args[1] == (10, 6)
+
+
+def test_list_users_rejects_bad_cursor_and_limit():
+    client = app.test_client()
+    assert client.get("/users?after=not-a-cursor").status_code == 400
+    assert client.get("/users?limit=0").status_code == 400
+    assert client.get("/users?limit=abc").status_code == 400
+
+
+def test_get_user_by_id(mock_db):
+    db, cursor = mock_db
+    cursor.fetchall.return_value = [{"id": 7, "name": "Ann", "email": "ann@x.io"}]
+
+    resp = app.test_client().get("/users/7")
+    assert resp.status_code == 200
+    assert resp.json["name"] == "Ann"
+
+
+def test_get_user_not_found(mock_db):
+    db, cursor = mock_db
+    cursor.fetchall.return_value = []
+
+    assert app.test_client().get("/users/99").status_code == 404
+
+
+def test_list_users_by_ids_keeps_request_order(mock_db):
+    db, cursor = mock_db
+    cursor.fetchall.return_value = [{"id": 1, "name": "a", "email": "a@x"}, {"id": 3, "name": "c", "email": "c@x"}]
+
+    resp = app.test_client().get("/users?ids=3,2,1,3")
+    assert resp.status_code == 200
+    assert [u["id"] for u in resp.json] == [3, 1]
+    sql, params = cursor.execute.call_args.args
+    assert "IN (%s, %s, %s)" in sql
+    assert params == [3, 2, 1]
+
+
+def test_list_users_by_email(mock_db):
+    db, cursor = mock_db
+    cursor.fetchone.return_value = None
+
+    resp = app.test_client().get("/users?email=nobody@x.io")
+    assert resp.status_code == 200
+    assert resp.json == []
+
+
+def test_list_users_rejects_bad_ids():
+    assert app.test_client().get("/users?ids=1,x").status_code == 400